@@ -0,0 +1,81 @@
+import argparse
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from generator import generate_puzzle
+from logic import *
+
+ENGINES = {
+    "model_check": model_check,
+    "parallel_model_check": parallel_model_check
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time inference engines on generated knights puzzles.")
+    parser.add_argument("sizes", nargs="*", type=int, default=[2, 4, 6, 8],
+                        help="numbers of inhabitants to benchmark")
+    parser.add_argument("--statements", type=int, default=1,
+                        help="nested statements made by each inhabitant")
+    parser.add_argument("--depth", type=int, default=2,
+                        help="maximum nesting depth of statements")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        default=list(ENGINES))
+    parser.add_argument("--json", action="store_true",
+                        help="print one JSON record per run, with the "
+                             "speedup of parallel_model_check over "
+                             "model_check at its size")
+    args = parser.parse_args()
+
+    # One pool, and one event to cancel its workers, serve every query
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor() as executor:
+        engines = dict(ENGINES, parallel_model_check=partial(
+            parallel_model_check, executor=executor,
+            cancelled=manager.Event()))
+        for n in args.sizes:
+            knowledge, symbols, solution = generate_puzzle(
+                n, statements=args.statements, depth=args.depth, seed=args.seed)
+            results = []
+            for engine in args.engines:
+                result = benchmark(engines[engine], knowledge, symbols, solution)
+                result.update(engine=engine, inhabitants=n, symbols=len(symbols))
+                results.append(result)
+
+            # Speedup of parallel_model_check over model_check at this size
+            seconds = {result["engine"]: result["seconds"] for result in results}
+            speedup = None
+            if "model_check" in seconds and "parallel_model_check" in seconds:
+                speedup = (seconds["model_check"]
+                           / max(seconds["parallel_model_check"], 1e-9))
+
+            for result in results:
+                result["speedup"] = speedup
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    status = "correct" if result["correct"] else "WRONG"
+                    print(f"{n:3} inhabitants  {result['engine']:22} "
+                          f"{result['seconds']:9.3f}s  {status}")
+            if speedup is not None and not args.json:
+                print(f"{n:3} inhabitants  {'speedup':22} {speedup:9.2f}x")
+
+
+def benchmark(check, knowledge, symbols, solution):
+    """
+    Ask `check` whether `knowledge` entails each of `symbols`, and
+    return the wall-clock time taken and whether the entailed symbols
+    are exactly the puzzle's `solution`.
+    """
+    start = time.perf_counter()
+    entailed = {symbol for symbol in symbols if check(knowledge, symbol)}
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "correct": entailed == solution}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import random
+
+from logic import *
+
+
+def generate_puzzle(n, statements=1, depth=2, seed=None):
+    """
+    Generate a random solvable knights-and-knaves puzzle.
+
+    Return a tuple (knowledge, symbols, solution), where `knowledge` is
+    the knowledge base, `symbols` lists the Knight and Knave symbols of
+    all `n` inhabitants, and `solution` is the set of those symbols that
+    are true in the puzzle's only model.
+
+    A hidden identity is chosen for each inhabitant. One inhabitant's
+    statement pins down their own identity, and every other inhabitant
+    makes a statement about someone before them, so the solution is
+    unique. On top of that, each inhabitant makes `statements` random
+    statements nested up to `depth` levels, negated where needed so that
+    knights tell the truth and knaves lie.
+    """
+    rng = random.Random(seed)
+    names = [person_name(i) for i in range(n)]
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+
+    # Choose the hidden solution
+    is_knight = [rng.random() < 0.5 for _ in range(n)]
+    model = dict()
+    for i in range(n):
+        model[knights[i].name] = is_knight[i]
+        model[knaves[i].name] = not is_knight[i]
+
+    knowledge = And()
+    for i in range(n):
+        knowledge.add(Biconditional(knights[i], Not(knaves[i])))
+
+    def says(i, statement):
+        """Add to the knowledge base that inhabitant i says `statement`."""
+        knowledge.add(Implication(knights[i], statement))
+        knowledge.add(Implication(knaves[i], Not(statement)))
+
+    # The first inhabitant says "I am a knave or <something true>"
+    # if a knight, or "I am a knave and <something false>" if a knave
+    order = list(range(n))
+    rng.shuffle(order)
+    root = order[0]
+    if is_knight[root]:
+        claim = random_statement(rng, knights, knaves, depth, model, True)
+        says(root, Or(knaves[root], claim))
+    else:
+        claim = random_statement(rng, knights, knaves, depth, model, False)
+        says(root, And(knaves[root], claim))
+
+    # Everyone else says whether someone before them is a knight
+    for position in range(1, n):
+        i = order[position]
+        j = order[rng.randrange(position)]
+        if is_knight[i] == is_knight[j]:
+            says(i, knights[j])
+        else:
+            says(i, knaves[j])
+
+    # Nested statements consistent with the solution
+    for i in range(n):
+        for _ in range(statements):
+            says(i, random_statement(rng, knights, knaves, depth,
+                                     model, is_knight[i]))
+
+    solution = {symbol for symbol in knights + knaves if model[symbol.name]}
+    return knowledge, knights + knaves, solution
+
+
+def random_statement(rng, knights, knaves, depth, model, truth):
+    """
+    Return a random statement about the inhabitants, nested up to
+    `depth` levels, whose value in `model` is `truth`.
+    """
+    statement = _random_sentence(rng, knights, knaves, depth)
+    if statement.evaluate(model) != truth:
+        statement = Not(statement)
+    return statement
+
+
+def _random_sentence(rng, knights, knaves, depth):
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(rng.choice([knights, knaves]))
+
+    kind = rng.choice(["not", "and", "or", "implication"])
+    if kind == "not":
+        return Not(_random_sentence(rng, knights, knaves, depth - 1))
+    operands = [_random_sentence(rng, knights, knaves, depth - 1)
+                for _ in range(2)]
+    if kind == "and":
+        return And(*operands)
+    elif kind == "or":
+        return Or(*operands)
+    else:
+        return Implication(*operands)
+
+
+def person_name(i):
+    """Return the name of the i-th inhabitant: A, B, ..., Z, AA, AB, ..."""
+    name = ""
+    i += 1
+    while i:
+        i, remainder = divmod(i - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
@@ -1,5 +1,15 @@
 import itertools
 
+#Additional imports
+import contextlib
+import json
+import multiprocessing
+import re
+import struct
+import sys
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 
 class Sentence():
 
@@ -41,6 +51,71 @@ class Sentence():
         else:
             return f"({s})"
 
+    @classmethod
+    def format(cls, sentence):
+        """
+        Returns the formula of a sentence in time linear in its size.
+
+        Produces the same text as parenthesizing every operand's formula,
+        but decides whether an operand needs parentheses from its type
+        instead of rescanning the text at every level of nesting.
+        """
+        parts = []
+        stack = [sentence]
+
+        def push(operand):
+            if cls._atomic(operand):
+                stack.append(operand)
+            else:
+                stack.extend([")", operand, "("])
+
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+            elif isinstance(item, Symbol):
+                parts.append(item.name)
+            elif isinstance(item, Not):
+                parts.append("¬")
+                push(item.operand)
+            elif isinstance(item, (And, Or)):
+                if isinstance(item, And):
+                    operands, separator = item.conjuncts, " ∧ "
+                else:
+                    operands, separator = item.disjuncts, " ∨  "
+                if len(operands) == 1:
+                    stack.append(operands[0])
+                    continue
+                for k, operand in enumerate(reversed(operands)):
+                    if k:
+                        stack.append(separator)
+                    push(operand)
+            elif isinstance(item, Implication):
+                push(item.consequent)
+                stack.append(" => ")
+                push(item.antecedent)
+            elif isinstance(item, Biconditional):
+                push(item.right)
+                stack.append(" <=> ")
+                push(item.left)
+            else:
+                parts.append(cls.parenthesize(item.formula()))
+        return "".join(parts)
+
+    @classmethod
+    def _atomic(cls, sentence):
+        """Checks if a sentence's formula needs no parentheses around it."""
+        while isinstance(sentence, (And, Or)):
+            operands = (sentence.conjuncts if isinstance(sentence, And)
+                        else sentence.disjuncts)
+            if len(operands) != 1:
+                return not operands
+            sentence = operands[0]
+        if isinstance(sentence, Symbol):
+            return cls.parenthesize(sentence.name) == sentence.name
+        # Other sentences are rendered by format() itself
+        return not isinstance(sentence, (Not, Implication, Biconditional))
+
 
 class Symbol(Sentence):
 
@@ -87,7 +162,7 @@ class Not(Sentence):
         return not self.operand.evaluate(model)
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+        return Sentence.format(self)
 
     def symbols(self):
         return self.operand.symbols()
@@ -121,10 +196,7 @@ class And(Sentence):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
-        if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+        return Sentence.format(self)
 
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
@@ -152,10 +224,7 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
-        if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+        return Sentence.format(self)
 
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
@@ -184,9 +253,7 @@ class Implication(Sentence):
                 or self.consequent.evaluate(model))
 
     def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+        return Sentence.format(self)
 
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
@@ -217,9 +284,7 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+        return Sentence.format(self)
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
@@ -261,3 +326,303 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def parallel_model_check(knowledge, query, split=None, max_workers=None,
+                         executor=None, cancelled=None):
+    """
+    Checks if knowledge base entails query, splitting the enumeration
+    across processes.
+
+    The first `split` symbols are fixed to each of their 2^split
+    assignments, and every resulting sub-cube of models is checked by a
+    worker of a process pool. As soon as one worker finds a model where
+    the knowledge base holds but the query does not, all remaining
+    workers are cancelled.
+
+    Starting a pool and a manager for the cancellation event takes a
+    noticeable fraction of a second, so callers making many queries
+    should create them once and pass them as `executor` (a
+    ProcessPoolExecutor) and `cancelled` (an Event from a
+    multiprocessing.Manager); otherwise both are created for this query.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    if max_workers is None:
+        max_workers = multiprocessing.cpu_count()
+    if split is None:
+        # Enough sub-cubes to keep every worker busy (a few per worker)
+        split = max(0, (4 * max_workers - 1).bit_length())
+    split = min(split, len(symbols))
+
+    with contextlib.ExitStack() as stack:
+        if cancelled is None:
+            cancelled = stack.enter_context(multiprocessing.Manager()).Event()
+        if executor is None:
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=max_workers))
+        cancelled.clear()
+
+        fixed, remaining = symbols[:split], symbols[split:]
+        pending = {
+            executor.submit(_check_subcube, knowledge, query,
+                            dict(zip(fixed, values)), remaining, cancelled)
+            for values in itertools.product((True, False), repeat=split)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if not all(future.result() for future in done):
+                cancelled.set()
+                for future in pending:
+                    future.cancel()
+                # Let running workers stop, so a reused pool is idle
+                wait(pending)
+                return False
+    return True
+
+
+def _check_subcube(knowledge, query, model, symbols, cancelled):
+    """
+    Checks entailment over every model extending `model` with an
+    assignment to `symbols`. Models are visited in Gray-code order, so
+    each differs from the previous one in a single symbol. Gives up
+    early (returning True, which is ignored by the caller) once
+    `cancelled` is set by another worker.
+    """
+    model.update(dict.fromkeys(symbols, True))
+    for count in range(1 << len(symbols)):
+        if count:
+            # The symbol to flip is given by the lowest set bit of count
+            symbol = symbols[(count & -count).bit_length() - 1]
+            model[symbol] = not model[symbol]
+        if count % 4096 == 0 and cancelled.is_set():
+            return True
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False
+    return True
+
+
+# Operator precedence for parsing formulas, from loosest to tightest
+PRECEDENCE = {"<=>": 0, "=>": 1, "∨": 2, "∧": 3, "¬": 4}
+
+# Operators, parentheses, symbol names, and any other single character,
+# which is an error
+TOKEN = re.compile(r"<=>|=>|[¬∧∨()]|[^¬∧∨()<=]+|(.)", re.DOTALL)
+
+
+def parse(formula):
+    """
+    Parses a formula, as written by Sentence.formula(), into a Sentence.
+
+    Symbol names are the text between operators and parentheses, with
+    surrounding whitespace removed, so they may not themselves contain
+    parentheses, operators, "<" or "=". Operators bind from tightest to
+    loosest as ¬, ∧, ∨, =>, <=>; => groups to the right, and chains of
+    ∧ or ∨ become a single And or Or. Runs in time linear in the length
+    of the formula, without recursion.
+    """
+    operands = []
+    operators = []
+    expect_operand = True
+
+    def reduce():
+        operator = operators.pop()
+        if operator == "¬":
+            operands.append((Not(operands.pop()[0]), None))
+            return
+        right, _ = operands.pop()
+        left, chain = operands.pop()
+        if operator == "∧":
+            if chain == "∧":
+                left.add(right)
+            else:
+                left = And(left, right)
+        elif operator == "∨":
+            if chain == "∨":
+                left.disjuncts.append(right)
+            else:
+                left = Or(left, right)
+        elif operator == "=>":
+            left = Implication(left, right)
+        else:
+            left = Biconditional(left, right)
+        operands.append((left, operator if operator in ("∧", "∨") else None))
+
+    for match in TOKEN.finditer(formula):
+        if match.group(1) is not None:
+            raise ValueError(f"unexpected {match.group(1)!r} at position "
+                             f"{match.start()}")
+        token = match.group().strip()
+        if not token:
+            continue
+        if expect_operand:
+            if token in ("¬", "("):
+                operators.append(token)
+            elif token in PRECEDENCE or token == ")":
+                raise ValueError(f"expected operand at position {match.start()}")
+            else:
+                operands.append((Symbol(token), None))
+                expect_operand = False
+        elif token == ")":
+            while operators and operators[-1] != "(":
+                reduce()
+            if not operators:
+                raise ValueError(f"unbalanced ')' at position {match.start()}")
+            operators.pop()
+            operands[-1] = (operands[-1][0], None)
+        elif token in PRECEDENCE and token != "¬":
+            while operators and operators[-1] != "(" and (
+                PRECEDENCE[operators[-1]] > PRECEDENCE[token] or (
+                    PRECEDENCE[operators[-1]] == PRECEDENCE[token]
+                    and token != "=>")):
+                reduce()
+            operators.append(token)
+            expect_operand = True
+        else:
+            raise ValueError(f"expected operator at position {match.start()}")
+
+    if expect_operand:
+        raise ValueError("formula ended where an operand was expected")
+    while operators:
+        if operators[-1] == "(":
+            raise ValueError("unbalanced '('")
+        reduce()
+    return operands[0][0]
+
+
+# Opcodes of the postfix encoding; non-negative codes push a symbol
+NOT, AND, OR, IMPLICATION, BICONDITIONAL = -1, -2, -3, -4, -5
+
+
+def encode(sentence):
+    """
+    Encodes a sentence as a tuple (names, code): the list of symbol
+    names it uses, and a flat postfix program of integers that rebuilds
+    it. A non-negative code pushes the symbol with that index in
+    `names`; NOT, IMPLICATION and BICONDITIONAL pop their operands; AND
+    and OR are followed by their number of operands.
+    """
+    names = []
+    index = dict()
+    code = []
+    stack = [(sentence, False)]
+    while stack:
+        item, expanded = stack.pop()
+        if isinstance(item, Symbol):
+            if item.name not in index:
+                index[item.name] = len(names)
+                names.append(item.name)
+            code.append(index[item.name])
+        elif expanded:
+            if isinstance(item, Not):
+                code.append(NOT)
+            elif isinstance(item, And):
+                code.extend([AND, len(item.conjuncts)])
+            elif isinstance(item, Or):
+                code.extend([OR, len(item.disjuncts)])
+            elif isinstance(item, Implication):
+                code.append(IMPLICATION)
+            else:
+                code.append(BICONDITIONAL)
+        else:
+            stack.append((item, True))
+            if isinstance(item, Not):
+                operands = [item.operand]
+            elif isinstance(item, And):
+                operands = item.conjuncts
+            elif isinstance(item, Or):
+                operands = item.disjuncts
+            elif isinstance(item, Implication):
+                operands = [item.antecedent, item.consequent]
+            elif isinstance(item, Biconditional):
+                operands = [item.left, item.right]
+            else:
+                raise TypeError(f"cannot encode {type(item).__name__}")
+            stack.extend((operand, False) for operand in reversed(operands))
+    return names, code
+
+
+def decode(names, code):
+    """Rebuilds the sentence encoded by `encode` as (names, code)."""
+    symbols = [Symbol(name) for name in names]
+    stack = []
+    code = iter(code)
+    for op in code:
+        if op >= 0:
+            stack.append(symbols[op])
+        elif op == NOT:
+            stack.append(Not(stack.pop()))
+        elif op in (AND, OR):
+            count = next(code)
+            operands = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            stack.append(And(*operands) if op == AND else Or(*operands))
+        elif op in (IMPLICATION, BICONDITIONAL):
+            right = stack.pop()
+            left = stack.pop()
+            stack.append(Implication(left, right) if op == IMPLICATION
+                         else Biconditional(left, right))
+        else:
+            raise ValueError(f"invalid opcode {op}")
+    if len(stack) != 1:
+        raise ValueError("code does not encode a single sentence")
+    return stack[0]
+
+
+def to_json(sentence):
+    """Serializes a sentence as compact JSON."""
+    names, code = encode(sentence)
+    return json.dumps({"symbols": names, "code": code},
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+def from_json(text):
+    """Deserializes a sentence written by `to_json`."""
+    data = json.loads(text)
+    return decode(data["symbols"], data["code"])
+
+
+MAGIC = b"KB01"
+
+
+def save(sentence, filename):
+    """
+    Writes a sentence to a binary file: the symbol names as
+    length-prefixed UTF-8, followed by the postfix code as int32s.
+    """
+    names, code = encode(sentence)
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(names)))
+        for name in names:
+            data = name.encode("utf-8")
+            f.write(struct.pack("<I", len(data)))
+            f.write(data)
+        code = array("i", code)
+        if sys.byteorder == "big":
+            code.byteswap()
+        f.write(struct.pack("<I", len(code)))
+        f.write(code.tobytes())
+
+
+def load(filename):
+    """Reads a sentence written by `save`."""
+    with open(filename, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{filename} is not a knowledge base file")
+    offset = 4
+    (count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    names = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        names.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    (length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    code = array("i")
+    code.frombytes(data[offset:offset + 4 * length])
+    if sys.byteorder == "big":
+        code.byteswap()
+    return decode(names, code)
@@ -2,7 +2,10 @@ import itertools
 import random
 
 #Additional imports
-import copy
+import math
+import time
+
+import numpy as np
 
 class Minesweeper():
     """
@@ -86,6 +89,69 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+class NumpyMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation backed by NumPy arrays,
+    for simulating large boards
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+
+        # Place all mines at once by sampling cells without replacement
+        rng = np.random.default_rng(seed)
+        cells = rng.choice(height * width, size=mines, replace=False)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[cells] = True
+        self.mines = set(zip(*map(np.ndarray.tolist, divmod(cells, width))))
+
+        # Count the mines around every cell by convolving the board with
+        # a 3x3 kernel of ones, then removing each cell's own mine
+        padded = np.pad(self.board.astype(np.uint8), 1)
+        self.counts = sum(
+            padded[di:di + height, dj:dj + width]
+            for di in range(3) for dj in range(3)
+        ) - self.board
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return int(self.counts[cell])
+
+    def reveal(self, cell):
+        """
+        Reveals a safe cell, flood-filling outwards through cells with no
+        nearby mines. Returns a list of (cell, nearby mines) pairs for
+        every revealed cell, starting with `cell` itself.
+        """
+        revealed = [(cell, self.nearby_mines(cell))]
+        seen = {cell}
+        frontier = [cell]
+        while frontier:
+            i, j = frontier.pop()
+            if self.counts[i, j]:
+                continue
+            for ni in range(max(i - 1, 0), min(i + 2, self.height)):
+                for nj in range(max(j - 1, 0), min(j + 2, self.width)):
+                    if (ni, nj) not in seen:
+                        seen.add((ni, nj))
+                        revealed.append(((ni, nj), int(self.counts[ni, nj])))
+                        frontier.append((ni, nj))
+        return revealed
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
@@ -143,12 +209,18 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, time_budget=0.5):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, used to weigh guesses
+        self.total_mines = mines
+
+        # Seconds allowed for computing mine probabilities when guessing
+        self.time_budget = time_budget
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -156,8 +228,22 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells that have not been clicked on yet
+        self.safe_moves = set()
+
+        # Sentences about the game known to be true, keyed by their cells
+        self._sentences = dict()
+
+        # For each undetermined cell, the keys of the sentences containing it
+        self.index = dict()
+
+        # Keys of sentences that are new or changed, and need re-examining
+        self.worklist = []
+
+    @property
+    def knowledge(self):
+        """The list of sentences about the game known to be true."""
+        return list(self._sentences.values())
 
     def mark_mine(self, cell):
         """
@@ -165,8 +251,10 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for key in self.index.pop(cell, ()):
+            sentence = self.remove_sentence(key)
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
@@ -174,8 +262,37 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for key in self.index.pop(cell, ()):
+            sentence = self.remove_sentence(key)
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for inference,
+        unless it is empty or a sentence about the same cells is known.
+        """
+        key = frozenset(sentence.cells)
+        if not key or key in self._sentences:
+            return
+        self._sentences[key] = sentence
+        for cell in key:
+            self.index.setdefault(cell, set()).add(key)
+        self.worklist.append(key)
+
+    def remove_sentence(self, key):
+        """
+        Removes and returns the sentence about the cells in `key`.
+        """
+        for cell in key:
+            keys = self.index.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[cell]
+        return self._sentences.pop(key)
 
     def add_knowledge(self, cell, count):
         """
@@ -194,46 +311,50 @@ class MinesweeperAI():
         """
         #1) marks the cell as a move that has been made
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
 
         #2) marks the cell as safe
-        self.safes.add(cell)
+        self.mark_safe(cell)
 
         #3) add a new sentence to the AI's knowledge base
         #   based on the value of `cell` and `count`
-        sentence_cells = self.get_neighbors(cell)
-        iterable_sentence_cells = copy.deepcopy(sentence_cells)
-        sentence_count = count                             
-
-        #Making sure to only include cells whose state is still undetermined                                         
-        for neighbor in iterable_sentence_cells:
+        #   Making sure to only include cells whose state is still undetermined
+        sentence_cells = set()
+        sentence_count = count
+        for neighbor in self.get_neighbors(cell):
             if neighbor in self.mines:
-                sentence_cells.remove(neighbor)
                 sentence_count -= 1
-            elif neighbor in self.safes:
-                sentence_cells.remove(neighbor)
-
-        self.knowledge.append(Sentence(cells=sentence_cells, count=sentence_count))
-
-        #5) add any new sentences to the AI's knowledge base
-        #   if they can be inferred from existing knowledge
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
-                if sentence1 != sentence2:
-                    if sentence1.cells.issubset(sentence2.cells):
-                        sentence_cells = sentence2.cells - sentence1.cells
-                        sentence_count = sentence2.count - sentence1.count
-                        if Sentence(cells=sentence_cells, count=sentence_count) not in self.knowledge:
-                            self.knowledge.append(Sentence(cells=sentence_cells, count=sentence_count))
-
-        #4) mark any additional cells as safe or as mines
-        #   if it can be concluded based on the AI's knowledge base
-        for sentence in self.knowledge:
-            known_mines = copy.deepcopy(sentence.known_mines())
-            known_safes = copy.deepcopy(sentence.known_safes())
-            for cell in known_mines:
-                self.mark_mine(cell)
-            for cell in known_safes:
-                self.mark_safe(cell)
+            elif neighbor not in self.safes:
+                sentence_cells.add(neighbor)
+        self.add_sentence(Sentence(cells=sentence_cells, count=sentence_count))
+
+        #4) and 5) only re-examine sentences that are new or have changed,
+        #   comparing each with the sentences that share a cell with it
+        while self.worklist:
+            key = self.worklist.pop()
+            sentence = self._sentences.get(key)
+            if sentence is None:
+                continue
+
+            known_mines = list(sentence.known_mines())
+            known_safes = list(sentence.known_safes())
+            if known_mines or known_safes:
+                for mine in known_mines:
+                    self.mark_mine(mine)
+                for safe in known_safes:
+                    self.mark_safe(safe)
+                continue
+
+            overlapping = set().union(*(self.index[c] for c in key))
+            overlapping.discard(key)
+            for other_key in overlapping:
+                other = self._sentences[other_key]
+                if key < other_key:
+                    self.add_sentence(Sentence(cells=other_key - key,
+                                               count=other.count - sentence.count))
+                elif other_key < key:
+                    self.add_sentence(Sentence(cells=key - other_key,
+                                               count=sentence.count - other.count))
 
     def make_safe_move(self):
         """
@@ -244,24 +365,32 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for move in self.safes:
-            if move not in self.moves_made:
-                return move
+        for move in self.safe_moves:
+            return move
         return None
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking the cell least likely to be a mine given the knowledge
+        base and the total number of mines.
         """
-        for i in range(self.height):
-            for j in range(self.width):
-                move = (i, j)
-                if move not in self.moves_made and move not in self.mines:
-                    return move
-        return None
+        unknown = set(itertools.product(range(self.height), range(self.width)))
+        unknown -= self.moves_made | self.mines | self.safes
+        if not unknown:
+            for move in self.safe_moves:
+                return move
+            return None
+
+        probabilities = mine_probabilities(
+            [(key, sentence.count) for key, sentence in self._sentences.items()],
+            unknown, self.total_mines - len(self.mines),
+            deadline=time.perf_counter() + self.time_budget
+        )
+        return min(unknown, key=lambda cell: (probabilities[cell], cell))
 
     def get_neighbors(self, cell):
         """
@@ -280,3 +409,437 @@ class MinesweeperAI():
                 cells.add(neighbor)
 
         return cells
+
+
+class BitboardMinesweeperAI():
+    """
+    Minesweeper game player that encodes cells as integers
+    (i * width + j) and sentences as integer bitmasks of those cells,
+    so inference is done with bit operations.
+
+    A sentence's cells always lie within three rows of each other, so it
+    is stored as a pair (base, mask): the lowest cell in the sentence,
+    and a bitmask of its cells shifted down by `base`. Masks therefore
+    stay a few rows wide however large the board is.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, time_budget=0.5):
+
+        # Set initial height and width
+        self.height = height
+        self.width = width
+
+        # Total number of mines on the board, used to weigh guesses
+        self.total_mines = mines
+
+        # Seconds allowed for computing mine probabilities when guessing
+        self.time_budget = time_budget
+
+        # Keep track of which cells have been clicked on
+        self.moves_made = set()
+        self.moved = 0
+
+        # Keep track of cells known to be safe or mines, as bitmasks
+        self.mine_mask = 0
+        self.safe_mask = 0
+
+        # Sentences known to be true, as a map from (base, mask) to the
+        # number of those cells which are mines
+        self.knowledge = dict()
+
+        # For each undetermined cell, the sentences containing it
+        self.index = dict()
+
+        # Sentences that are new or changed, and need re-examining
+        self.worklist = []
+
+    @property
+    def mines(self):
+        """The set of (i, j) cells known to be mines."""
+        return {self.cell(c) for c in dense_bits(self.mine_mask)}
+
+    @property
+    def safes(self):
+        """The set of (i, j) cells known to be safe."""
+        return {self.cell(c) for c in dense_bits(self.safe_mask)}
+
+    def cell(self, c):
+        """Returns the (i, j) cell encoded by the integer c."""
+        return divmod(c, self.width)
+
+    def neighbors(self, c):
+        """
+        Returns the neighbors of the cell encoded by c as (base, mask).
+        """
+        i, j = self.cell(c)
+        top, left = max(i - 1, 0), max(j - 1, 0)
+        row = (1 << (min(j + 2, self.width) - left)) - 1
+        mask = 0
+        for k in range(min(i + 2, self.height) - top):
+            mask |= row << (k * self.width)
+        base = top * self.width + left
+        return base, mask & ~(1 << (c - base))
+
+    def mark_mine(self, c):
+        """
+        Marks the cell encoded by c as a mine, and updates all knowledge
+        to mark that cell as a mine as well.
+        """
+        self.mine_mask |= 1 << c
+        for sentence in self.index.pop(c, ()):
+            count = self.remove_sentence(sentence)
+            base, mask = sentence
+            self.add_sentence(base, mask & ~(1 << (c - base)), count - 1)
+
+    def mark_safe(self, c):
+        """
+        Marks the cell encoded by c as safe, and updates all knowledge
+        to mark that cell as safe as well.
+        """
+        self.safe_mask |= 1 << c
+        for sentence in self.index.pop(c, ()):
+            count = self.remove_sentence(sentence)
+            base, mask = sentence
+            self.add_sentence(base, mask & ~(1 << (c - base)), count)
+
+    def add_sentence(self, base, mask, count):
+        """
+        Adds a sentence about the cells `mask` << `base` to the knowledge
+        base and queues it for inference, unless it is empty or a
+        sentence about the same cells is known.
+        """
+        if not mask:
+            return
+        shift = (mask & -mask).bit_length() - 1
+        sentence = (base + shift, mask >> shift)
+        if sentence in self.knowledge:
+            return
+        self.knowledge[sentence] = count
+        for c in cells(sentence):
+            self.index.setdefault(c, set()).add(sentence)
+        self.worklist.append(sentence)
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base, returning its count.
+        """
+        for c in cells(sentence):
+            sentences = self.index.get(c)
+            if sentences is not None:
+                sentences.discard(sentence)
+                if not sentences:
+                    del self.index[c]
+        return self.knowledge.pop(sentence)
+
+    def add_knowledge(self, cell, count):
+        """
+        Called when the Minesweeper board tells us, for a given
+        safe cell, how many neighboring cells have mines in them.
+
+        Marks the cell as a move that has been made and as safe, adds a
+        sentence about its undetermined neighbors, and draws every
+        conclusion that follows, re-examining only sentences that are
+        new or have changed.
+        """
+        i, j = cell
+        c = i * self.width + j
+        self.moves_made.add(cell)
+        self.moved |= 1 << c
+        self.mark_safe(c)
+
+        base, mask = self.neighbors(c)
+        count -= ((self.mine_mask >> base) & mask).bit_count()
+        known = (self.mine_mask | self.safe_mask) >> base
+        self.add_sentence(base, mask & ~known, count)
+
+        while self.worklist:
+            sentence = self.worklist.pop()
+            count = self.knowledge.get(sentence)
+            if count is None:
+                continue
+
+            base, mask = sentence
+            if count == 0:
+                for c in cells(sentence):
+                    self.mark_safe(c)
+                continue
+            if count == mask.bit_count():
+                for c in cells(sentence):
+                    self.mark_mine(c)
+                continue
+
+            overlapping = set().union(*(self.index[c] for c in cells(sentence)))
+            overlapping.discard(sentence)
+            for other in overlapping:
+                other_base, other_mask = other
+                other_count = self.knowledge[other]
+
+                # A sentence can only contain another whose lowest cell
+                # is no lower than its own
+                if other_base >= base:
+                    shifted = other_mask << (other_base - base)
+                    if shifted & mask == shifted:
+                        self.add_sentence(base, mask & ~shifted,
+                                          count - other_count)
+                if other_base <= base:
+                    shifted = mask << (base - other_base)
+                    if shifted & other_mask == shifted:
+                        self.add_sentence(other_base, other_mask & ~shifted,
+                                          other_count - count)
+
+    def make_safe_move(self):
+        """
+        Returns a safe cell to choose on the Minesweeper board.
+        The move must be known to be safe, and not already a move
+        that has been made.
+        """
+        moves = self.safe_mask & ~self.moved
+        if not moves:
+            return None
+        return self.cell((moves & -moves).bit_length() - 1)
+
+    def make_random_move(self):
+        """
+        Returns the move least likely to be a mine among cells that
+        have not already been chosen and are not known to be mines.
+        """
+        board = (1 << (self.height * self.width)) - 1
+        unknown = board & ~(self.moved | self.mine_mask | self.safe_mask)
+        if not unknown:
+            return self.make_safe_move()
+
+        unknown = set(dense_bits(unknown))
+        probabilities = mine_probabilities(
+            [(list(cells(sentence)), count)
+             for sentence, count in self.knowledge.items()],
+            unknown, self.total_mines - self.mine_mask.bit_count(),
+            deadline=time.perf_counter() + self.time_budget
+        )
+        return self.cell(min(unknown, key=lambda c: (probabilities[c], c)))
+
+
+def cells(sentence):
+    """Yields the integer cells of a (base, mask) sentence."""
+    base, mask = sentence
+    while mask:
+        low = mask & -mask
+        yield base + low.bit_length() - 1
+        mask ^= low
+
+
+def dense_bits(mask):
+    """Returns the positions of the set bits of a dense bitmask."""
+    return [c for c, bit in enumerate(reversed(bin(mask))) if bit == "1"]
+
+
+def mine_probabilities(constraints, unknown, mines_left, deadline=None):
+    """
+    Returns a dictionary mapping each cell in `unknown` to the
+    probability that it is a mine.
+
+    `constraints` is a list of (cells, count) pairs, each saying that
+    `count` of `cells` are mines, and `mines_left` is the number of mines
+    among all `unknown` cells. Cells mentioned by constraints (the
+    frontier) are split into independent connected components, and the
+    mine configurations consistent with each component are enumerated.
+    Components are then combined, weighing every total number of
+    frontier mines by the number of ways to place the remaining mines
+    among the cells no constraint mentions.
+
+    If `deadline` (a time.perf_counter() value) passes while a component
+    is being enumerated, its cells fall back to a local estimate from
+    the constraints that mention them, and it is left out of the
+    combination; the mines it holds, estimated from those constraints,
+    are no longer counted in `mines_left`.
+    """
+    probabilities = dict()
+    frontier = set()
+    for cells, _ in constraints:
+        frontier.update(cells)
+    interior = len(unknown) - len(frontier)
+
+    # Mine-count distributions of each component, normalized to sum to 1
+    distributions = []
+    timed_out = 0
+    for component in connected_components(constraints):
+        result = enumerate_component(component, mines_left, deadline)
+        if result is None:
+            estimates = dict()
+            for cells, count in component:
+                for cell in cells:
+                    estimates[cell] = max(estimates.get(cell, 0),
+                                          count / len(cells))
+            probabilities.update(estimates)
+            timed_out += max(max(count for _, count in component),
+                             round(sum(estimates.values())))
+        else:
+            distributions.append(result)
+            for cells, _ in component:
+                for cell in cells:
+                    probabilities[cell] = 0
+
+    # Mines estimated to lie in components left out of the combination
+    # cannot be among the cells no constraint mentions
+    mines_left = max(mines_left - timed_out, 0)
+
+    # Weight of each possible number of mines among the frontier cells
+    def log_ways(mines):
+        if not 0 <= mines <= interior:
+            return -math.inf
+        return (math.lgamma(interior + 1) - math.lgamma(mines + 1)
+                - math.lgamma(interior - mines + 1))
+    log_weights = [log_ways(mines_left - t) for t in range(max(mines_left, 0) + 1)]
+    top = max(log_weights)
+    weights = [math.exp(w - top) for w in log_weights]
+
+    # Distribution of mines among all components but one, from the
+    # products of the distributions before and after it
+    prefixes = [[1.0]]
+    for totals, _ in distributions:
+        prefixes.append(convolve(prefixes[-1], totals))
+    suffix = [1.0]
+    others = [None] * len(distributions)
+    for k in range(len(distributions) - 1, -1, -1):
+        others[k] = convolve(prefixes[k], suffix)
+        suffix = convolve(distributions[k][0], suffix)
+    combined = prefixes[-1]
+
+    total = sum(p * weights[t] for t, p in enumerate(combined)
+                if t < len(weights))
+    if total == 0:
+        # Knowledge inconsistent with the mine count; weigh uniformly
+        weights = [1.0] * len(combined)
+        total = sum(combined)
+
+    for (totals, cell_counts), rest in zip(distributions, others):
+        for mines, counts in cell_counts.items():
+            weight = sum(p * weights[mines + t] for t, p in enumerate(rest)
+                         if mines + t < len(weights))
+            for cell, count in counts.items():
+                probabilities[cell] = (probabilities.get(cell, 0)
+                                       + count * weight / total)
+
+    if interior:
+        expected = sum(p * weights[t] * max(mines_left - t, 0)
+                       for t, p in enumerate(combined) if t < len(weights))
+        interior_probability = expected / total / interior
+        for cell in unknown:
+            if cell not in frontier:
+                probabilities[cell] = interior_probability
+
+    return probabilities
+
+
+def connected_components(constraints):
+    """
+    Splits (cells, count) constraints into groups that share no cells
+    with constraints of other groups.
+    """
+    parent = dict()
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        cells = iter(cells)
+        root = find(next(cells))
+        for cell in cells:
+            parent[find(cell)] = root
+
+    components = dict()
+    for cells, count in constraints:
+        components.setdefault(find(next(iter(cells))), []).append((cells, count))
+    return list(components.values())
+
+
+def enumerate_component(constraints, mines_left, deadline=None):
+    """
+    Enumerates every assignment of mines to the cells of `constraints`
+    that satisfies all of them, using at most `mines_left` mines.
+
+    Returns a tuple (totals, cell_counts): totals[m] is the fraction of
+    consistent assignments with m mines, and cell_counts[m][cell] the
+    fraction with m mines that have a mine in `cell`. Returns None if
+    `deadline` passes first.
+    """
+    # Order cells so that constraints are completed as early as possible
+    cells = []
+    seen = set()
+    for constraint_cells, _ in constraints:
+        for cell in constraint_cells:
+            if cell not in seen:
+                seen.add(cell)
+                cells.append(cell)
+    position = {cell: i for i, cell in enumerate(cells)}
+
+    counts = [count for _, count in constraints]
+    mines = [0] * len(constraints)
+    unassigned = [len(constraint_cells) for constraint_cells, _ in constraints]
+    involved = [[] for _ in cells]
+    for k, (constraint_cells, _) in enumerate(constraints):
+        for cell in constraint_cells:
+            involved[position[cell]].append(k)
+
+    assignment = [0] * len(cells)
+    totals = dict()
+    cell_counts = dict()
+    visited = 0
+
+    def backtrack(i, placed):
+        nonlocal visited
+        visited += 1
+        if deadline is not None and visited % 1024 == 0 \
+                and time.perf_counter() > deadline:
+            raise TimeoutError
+        if i == len(cells):
+            totals[placed] = totals.get(placed, 0) + 1
+            found = cell_counts.setdefault(placed, dict())
+            for cell, value in zip(cells, assignment):
+                if value:
+                    found[cell] = found.get(cell, 0) + 1
+            return
+        for value in (0, 1):
+            if placed + value > mines_left:
+                break
+            consistent = True
+            for k in involved[i]:
+                mines[k] += value
+                unassigned[k] -= 1
+                if not mines[k] <= counts[k] <= mines[k] + unassigned[k]:
+                    consistent = False
+            if consistent:
+                assignment[i] = value
+                backtrack(i + 1, placed + value)
+            for k in involved[i]:
+                mines[k] -= value
+                unassigned[k] += 1
+
+    try:
+        backtrack(0, 0)
+    except (TimeoutError, RecursionError):
+        return None
+
+    found = sum(totals.values())
+    if not found:
+        return [1.0], dict()
+    distribution = [totals.get(m, 0) / found for m in range(max(totals) + 1)]
+    cell_counts = {
+        m: {cell: count / found for cell, count in counts.items()}
+        for m, counts in cell_counts.items()
+    }
+    return distribution, cell_counts
+
+
+def convolve(a, b):
+    """Returns the distribution of the sum of two independent counts."""
+    result = [0.0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
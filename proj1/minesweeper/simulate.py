@@ -0,0 +1,165 @@
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import (BitboardMinesweeperAI, Minesweeper, MinesweeperAI,
+                         NumpyMinesweeper)
+
+SIZES = ["8x8/8", "16x16/40", "30x16/99", "50x50/500"]
+
+PLAYERS = {
+    "sets": MinesweeperAI,
+    "bitboard": BitboardMinesweeperAI
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play seeded Minesweeper games headlessly with the AI "
+                    "and report win rate and add_knowledge latency as JSON.")
+    parser.add_argument("--games", type=int, default=1000,
+                        help="games to play for each board size")
+    parser.add_argument("--sizes", nargs="+", default=SIZES,
+                        help="board sizes as WIDTHxHEIGHT/MINES")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; game k uses seed + k")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--time-budget", type=float, default=0.5,
+                        help="seconds the AI may spend on each guess")
+    parser.add_argument("--numpy", action="store_true",
+                        help="use the NumPy board, revealing zero cells "
+                             "by flood fill")
+    parser.add_argument("--ai", choices=PLAYERS, default="sets",
+                        help="AI knowledge representation to play with")
+    parser.add_argument("--output", help="write the JSON report to a file")
+    args = parser.parse_args()
+
+    report = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for size in args.sizes:
+            width, height, mines = parse_size(size)
+            games = [(height, width, mines, args.seed + k, args.time_budget,
+                      args.numpy, args.ai)
+                     for k in range(args.games)]
+            start = time.perf_counter()
+            results = list(executor.map(play_game, games,
+                                        chunksize=max(1, args.games // 64)))
+            elapsed = time.perf_counter() - start
+            report.append(summarize(size, results, elapsed))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+def parse_size(size):
+    """Parse a board size written as WIDTHxHEIGHT/MINES."""
+    try:
+        dimensions, mines = size.split("/")
+        width, height = dimensions.lower().split("x")
+        return int(width), int(height), int(mines)
+    except ValueError:
+        sys.exit(f"Invalid board size {size!r}, expected e.g. 30x16/99")
+
+
+def play_game(game):
+    """
+    Play one game with the AI, revealing cells the way runner.py does.
+
+    `game` is a tuple (height, width, mines, seed, time_budget, numpy,
+    ai), where `ai` names one of PLAYERS. With `numpy`, the game is
+    played on a NumpyMinesweeper board and every cell its flood fill
+    reveals is passed to the AI. Return a
+    dictionary saying whether the game was won, how many moves and
+    guesses were made, and how long each call to add_knowledge took.
+    """
+    height, width, mines, seed, time_budget, numpy, player = game
+    if numpy:
+        board = NumpyMinesweeper(height=height, width=width, mines=mines,
+                                 seed=seed)
+    else:
+        random.seed(seed)
+        board = Minesweeper(height=height, width=width, mines=mines)
+    ai = PLAYERS[player](height=height, width=width, mines=mines,
+                         time_budget=time_budget)
+
+    safe_cells = height * width - mines
+    guesses = 0
+    latencies = []
+    won = False
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+            guesses += 1
+        if board.is_mine(move):
+            break
+
+        if numpy:
+            revealed = board.reveal(move)
+        else:
+            revealed = [(move, board.nearby_mines(move))]
+        for cell, nearby in revealed:
+            if cell in ai.moves_made:
+                continue
+            start = time.perf_counter()
+            ai.add_knowledge(cell, nearby)
+            latencies.append(time.perf_counter() - start)
+
+        if len(ai.moves_made) == safe_cells:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": len(ai.moves_made),
+        "guesses": guesses,
+        "latencies": latencies
+    }
+
+
+def summarize(size, results, elapsed):
+    """
+    Return the report for one board size from the results of its games.
+    """
+    latencies = sorted(
+        latency for result in results for latency in result["latencies"]
+    )
+    games = len(results)
+    wins = sum(result["won"] for result in results)
+    return {
+        "size": size,
+        "games": games,
+        "wins": wins,
+        "win_rate": wins / games,
+        "moves_per_game": sum(result["moves"] for result in results) / games,
+        "guesses_per_game": sum(result["guesses"] for result in results) / games,
+        "add_knowledge_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": (latencies[-1] if latencies else 0) * 1000
+        },
+        "seconds": elapsed
+    }
+
+
+def percentile(values, p):
+    """Return the p-th percentile of sorted `values` by nearest rank."""
+    if not values:
+        return 0
+    rank = max(0, -(-p * len(values) // 100) - 1)
+    return values[int(rank)]
+
+
+if __name__ == "__main__":
+    main()
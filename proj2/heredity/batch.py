@@ -0,0 +1,136 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from heredity import CHAINS, CHUNK, METHODS, SAMPLES, infer, load_data
+
+FORMATS = ("jsonl", "csv")
+
+CSV_FIELDS = ["file", "person", "gene_2", "gene_1", "gene_0", "trait_true",
+              "trait_false", "seconds", "error"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for many families "
+                    "in parallel, writing them all to one stream.")
+    parser.add_argument("inputs", nargs="+",
+                        help="CSV files, directories of CSV files, or glob "
+                             "patterns such as 'data/family*.csv'")
+    parser.add_argument("--method", choices=METHODS, default="elimination")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK,
+                        help="assignments scored at once by --method batch")
+    parser.add_argument("--samples", type=int, default=SAMPLES,
+                        help="samples drawn by the sampling methods")
+    parser.add_argument("--chains", type=int, default=CHAINS,
+                        help="chains run at once by --method gibbs")
+    parser.add_argument("--seed", type=int, help="seed of the sampling methods")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl",
+                        help="one JSON record per family, or one CSV row "
+                             "per person")
+    parser.add_argument("--output", help="write to a file instead of stdout")
+    args = parser.parse_args()
+
+    files = find_files(args.inputs)
+    if not files:
+        sys.exit("No family files found")
+
+    tasks = [(path, args.method, args.chunk_size, args.samples, args.chains,
+              args.seed) for path in files]
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = None
+        if args.format == "csv":
+            writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            chunksize = max(1, len(tasks) // (8 * (args.workers or os.cpu_count() or 1)))
+            for result in executor.map(infer_family, tasks, chunksize=chunksize):
+                if writer is None:
+                    output.write(json.dumps(result) + "\n")
+                else:
+                    writer.writerows(csv_rows(result))
+        elapsed = time.perf_counter() - start
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{len(files)} families in {elapsed:.3f}s", file=sys.stderr)
+
+
+def find_files(inputs):
+    """
+    Return the CSV files named by `inputs`, each a file, a directory (for
+    every CSV file in it) or a glob pattern, in order and without repeats.
+    """
+    files = []
+    for name in inputs:
+        if os.path.isdir(name):
+            matches = sorted(glob.glob(os.path.join(name, "*.csv")))
+        elif os.path.isfile(name):
+            matches = [name]
+        else:
+            matches = sorted(glob.glob(name))
+        if not matches:
+            print(f"No family files match {name}", file=sys.stderr)
+        files.extend(matches)
+    return list(dict.fromkeys(files))
+
+
+def infer_family(task):
+    """
+    Load one family file and compute its members' distributions.
+
+    `task` is a tuple (path, method, chunk, samples, chains, seed). Return
+    a dictionary with the file, the method, the seconds taken, and either
+    the distributions of every person (with standard errors, for the
+    sampling methods) or the error that stopped the computation.
+    """
+    path, method, chunk, samples, chains, seed = task
+    start = time.perf_counter()
+    result = {"file": path, "method": method}
+    try:
+        people = load_data(path)
+        probabilities, errors = infer(people, method, chunk, samples, chains,
+                                      seed)
+        result["probabilities"] = probabilities
+        if errors is not None:
+            result["errors"] = errors
+    except (OSError, KeyError, ValueError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def csv_rows(result):
+    """
+    Return the CSV rows of one family's result, one per person, or a
+    single row holding the error if it failed.
+    """
+    if "error" in result:
+        return [{"file": result["file"], "seconds": result["seconds"],
+                 "error": result["error"]}]
+    return [
+        {
+            "file": result["file"],
+            "person": person,
+            "gene_2": distributions["gene"][2],
+            "gene_1": distributions["gene"][1],
+            "gene_0": distributions["gene"][0],
+            "trait_true": distributions["trait"][True],
+            "trait_false": distributions["trait"][False],
+            "seconds": result["seconds"]
+        }
+        for person, distributions in result["probabilities"].items()
+    ]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import numpy as np
+
+# Most people a factor may range over (3 ** 14 entries)
+MAX_SCOPE = 14
+
+
+def gene_marginals(people, prior, inheritance, evidence):
+    """
+    Compute every person's gene distribution by exact inference on the
+    Bayesian network of a family, by variable elimination.
+
+    `people` maps each name to a dictionary with "mother" and "father"
+    (names, or both None). The network has one gene variable per person,
+    with values 0, 1 and 2, whose conditional distribution is `prior`
+    (a vector of 3 probabilities) for people without parents, and
+    `inheritance[mother genes, father genes]` otherwise. `evidence`
+    maps a name to a vector of 3 likelihoods of what is known about that
+    person (such as whether they have a trait) given their genes.
+
+    Rather than eliminating variables once per person, the elimination
+    is run once in a min-fill order, keeping the message each step sends
+    (a bucket tree), and once back in reverse; each person's marginal
+    then combines their own factor with the messages they received.
+
+    Return a dictionary mapping each name to its normalized gene
+    distribution, as a vector of 3 probabilities.
+    """
+    factors = family_factors(people, prior, inheritance, evidence)
+    order = min_fill_order(people, [scope for scope, _ in factors])
+    position = {person: i for i, person in enumerate(order)}
+
+    # Every factor goes to the bucket of its first variable eliminated
+    buckets = {person: [] for person in order}
+    for factor in factors:
+        buckets[min(factor[0], key=position.get)].append(factor)
+
+    # Upward pass: each bucket sends its variables, other than its own,
+    # to the bucket of the first of them to be eliminated next
+    scopes = dict()
+    parent = dict()
+    upward = dict()
+    received = {person: [] for person in order}
+    for person in order:
+        incoming = buckets[person] + [upward[child] for child in received[person]]
+        scope = tuple(sorted(set().union(*(variables for variables, _ in incoming)),
+                             key=position.get))
+        scopes[person] = scope
+        if len(scope) == 1:
+            parent[person] = None
+            continue
+        parent[person] = scope[1]
+        upward[person] = contract(incoming, scope[1:])
+        received[scope[1]].append(person)
+
+    # Downward pass, in reverse order: each bucket sends every child what
+    # it knows from everything but that child
+    downward = dict()
+    marginals = dict()
+    for person in reversed(order):
+        incoming = buckets[person] + [upward[child] for child in received[person]]
+        if parent[person] is not None:
+            incoming.append(downward[person])
+        marginal = contract(incoming, (person,))[1]
+        marginals[person] = marginal / marginal.sum()
+
+        for k, child in enumerate(received[person]):
+            others = (buckets[person]
+                      + [upward[other] for other in received[person][:k]]
+                      + [upward[other] for other in received[person][k + 1:]])
+            if parent[person] is not None:
+                others.append(downward[person])
+            downward[child] = contract(others, scopes[child][1:])
+
+    return marginals
+
+
+def family_factors(people, prior, inheritance, evidence):
+    """
+    Return the factors of a family's Bayesian network, one per person,
+    each a tuple (scope, table): the person's gene distribution given
+    their parents' genes, times the likelihood of any `evidence` about
+    them, with the table's axes following the names in `scope`.
+    """
+    factors = []
+    for person, data in people.items():
+        likelihood = np.asarray(evidence.get(person, np.ones(3)), dtype=np.float64)
+        if data["mother"] is None and data["father"] is None:
+            factors.append(((person,), np.asarray(prior) * likelihood))
+        else:
+            scope = (data["mother"], data["father"], person)
+            table = np.asarray(inheritance) * likelihood
+            if data["mother"] == data["father"]:
+                # Both parents the same person: keep the diagonal
+                scope = (data["mother"], person)
+                table = np.einsum("iij->ij", table)
+            factors.append((scope, table))
+    return factors
+
+
+def min_fill_order(people, scopes):
+    """
+    Return an elimination order of everyone in `people`, chosen greedily:
+    at every step, eliminate the person whose elimination adds the fewest
+    edges between their neighbours in the interaction graph of the
+    factors with the given `scopes` (ties broken by fewest neighbours,
+    then by order in `people`).
+    """
+    neighbors = {person: set() for person in people}
+    for scope in scopes:
+        for person in scope:
+            neighbors[person].update(scope)
+    for person in neighbors:
+        neighbors[person].discard(person)
+
+    def fill(person):
+        around = list(neighbors[person])
+        return sum(1 for i, a in enumerate(around) for b in around[i + 1:]
+                   if b not in neighbors[a])
+
+    index = {person: i for i, person in enumerate(people)}
+    cost = {person: (fill(person), len(neighbors[person]), index[person])
+            for person in people}
+    order = []
+    while cost:
+        person = min(cost, key=cost.get)
+        del cost[person]
+        order.append(person)
+
+        # Connect the neighbours, then rescore everyone whose
+        # neighbourhood may have changed
+        around = neighbors.pop(person)
+        for a in around:
+            neighbors[a].discard(person)
+            neighbors[a].update(around - {a})
+        affected = set(around)
+        for a in around:
+            affected.update(neighbors[a])
+        for a in affected:
+            cost[a] = (fill(a), len(neighbors[a]), index[a])
+    return order
+
+
+def contract(factors, scope):
+    """
+    Multiply `factors` together and sum out every variable not in
+    `scope`. Return the resulting factor, with its axes in the order of
+    `scope`, scaled to sum to 1 so that long chains of messages do not
+    underflow.
+    """
+    labels = dict()
+    operands = []
+    for variables, table in factors:
+        operands.append(table)
+        operands.append([labels.setdefault(v, len(labels)) for v in variables])
+
+    # Variables of `scope` no factor mentions are uniform
+    for v in scope:
+        if v not in labels:
+            operands.append(np.ones(3))
+            operands.append([labels.setdefault(v, len(labels))])
+    if len(scope) > MAX_SCOPE or len(labels) > 52:
+        raise ValueError(f"elimination needs a factor over {len(labels)} "
+                         f"people; the family is too interconnected for "
+                         f"exact inference")
+    table = np.einsum(*operands, [labels[v] for v in scope])
+    total = table.sum()
+    return tuple(scope), table / total if total > 0 else table
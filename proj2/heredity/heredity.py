@@ -1,10 +1,14 @@
+import argparse
 import csv
 import itertools
-import sys
+from concurrent.futures import ProcessPoolExecutor
 
 #Additional imports
 import numpy as np
 
+from elimination import gene_marginals
+from sampling import gibbs_sampling, likelihood_weighting
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -40,61 +44,319 @@ PROBS = {
 }
 
 
+METHODS = ("enumeration", "batch", "elimination", "likelihood-weighting",
+           "gibbs")
+
+# Joint assignments scored at once by the batch method
+CHUNK = 1 << 16
+
+# Default sample budget of the sampling methods, and chains run by Gibbs
+# sampling
+SAMPLES = 100000
+CHAINS = 1000
+
+
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for a family.",
+        usage="python heredity.py data.csv [--method METHOD]")
+    parser.add_argument("data", help="CSV file of people")
+    parser.add_argument("--method", choices=METHODS, default="enumeration",
+                        help="enumerate every joint assignment, one at a "
+                             "time or in NumPy batches, eliminate variables "
+                             "(exact, and fast for large families), or "
+                             "estimate by sampling")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK,
+                        help="assignments scored at once by --method batch")
+    parser.add_argument("--samples", type=int, default=SAMPLES,
+                        help="samples drawn by the sampling methods")
+    parser.add_argument("--chains", type=int, default=CHAINS,
+                        help="chains run at once by --method gibbs")
+    parser.add_argument("--seed", type=int, help="seed of the sampling methods")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes over which unrelated families in "
+                             "the file are split")
+    args = parser.parse_args()
+    people = load_data(args.data)
+
+    probabilities, errors = infer(people, args.method, args.chunk_size,
+                                  args.samples, args.chains, args.seed,
+                                  args.workers)
+
+    # Print results, with the standard error of estimates
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                if errors is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    print(f"    {value}: {p:.4f} ± "
+                          f"{errors[person][field][value]:.4f}")
+
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+def infer(people, method="enumeration", chunk=CHUNK, samples=SAMPLES,
+          chains=CHAINS, seed=None, workers=1):
+    """
+    Compute everyone's gene and trait distributions with one of METHODS.
+
+    People are split into unrelated families (see `family_components`),
+    which are independent, so each is computed on its own, over up to
+    `workers` processes; the k-th family's sampling uses seed + k.
+
+    Return a tuple of the distributions and, for the sampling methods,
+    the standard error of each estimate in the same form (None for exact
+    methods).
+    """
+    tasks = [
+        (component, method, chunk, samples, chains,
+         None if seed is None else seed + k)
+        for k, component in enumerate(family_components(people))
+    ]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(infer_component, tasks))
+    else:
+        results = [infer_component(task) for task in tasks]
+
+    # Merge the results, in the order of `people`
+    probabilities = dict()
+    errors = dict()
+    for component_probabilities, component_errors in results:
+        probabilities.update(component_probabilities)
+        if component_errors is not None:
+            errors.update(component_errors)
+    probabilities = {person: probabilities[person] for person in people}
+    if not errors:
+        return probabilities, None
+    return probabilities, {person: errors[person] for person in people}
+
+
+def infer_component(task):
+    """
+    Compute the distributions of one family, given as a tuple (people,
+    method, chunk, samples, chains, seed), as `infer` does.
+    """
+    people, method, chunk, samples, chains, seed = task
+    if method == "elimination":
+        return elimination_probabilities(people), None
+    elif method == "batch":
+        return batch_probabilities(people, chunk), None
+    elif method in ("likelihood-weighting", "gibbs"):
+        return sampled_probabilities(people, method, samples, chains, seed)
+    elif method == "enumeration":
+        return enumeration_probabilities(people), None
+    raise ValueError(f"unknown method {method!r}")
+
+
+def enumeration_probabilities(people):
+    """
+    Compute everyone's gene and trait distributions by summing the joint
+    probability of every assignment of genes and traits consistent with
+    the known traits.
+
+    Unknown traits are summed out analytically: for each assignment of
+    genes, the probability that a person whose trait is unknown has it
+    is P(trait | genes), so only the 3^N gene assignments are visited,
+    rather than 3^N times 2 to the number of unknown traits.
+
+    Probabilities are accumulated as logarithms, so joint probabilities
+    too small for a float do not vanish.
+    """
+
+    # Keep track of the logarithms of gene and trait probabilities for
+    # each person
+    log_probabilities = {
         person: {
             "gene": {
-                2: 0,
-                1: 0,
-                0: 0
+                2: -np.inf,
+                1: -np.inf,
+                0: -np.inf
             },
             "trait": {
-                True: 0,
-                False: 0
+                True: -np.inf,
+                False: -np.inf
             }
         }
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+    # Loop lazily over every assignment of genes; traits nobody knows
+    # are summed out, so they are never enumerated
+    family = Family(people)
+    for genes in itertools.product((0, 1, 2), repeat=len(family)):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+        # Update probabilities with the joint probability of the genes
+        # and the known traits
+        log_p = joint_log_probabilities(family, genes, family.trait)
+        log_update_genes(log_probabilities, family, genes, log_p)
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    # Ensure probabilities sum to 1
+    return log_normalize(log_probabilities)
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+def batch_probabilities(people, chunk=CHUNK):
+    """
+    Compute everyone's gene and trait distributions by enumerating every
+    joint assignment, like `enumeration_probabilities`, but `chunk`
+    assignments at a time as NumPy arrays.
+
+    Assignments are numbered in base 3, each digit one person's genes;
+    unknown traits are summed out as by `enumeration_probabilities`. A
+    chunk of numbers is decoded into an array of genes, scored by
+    `joint_log_probabilities`, and added to everyone's gene distributions
+    with a single bincount, so memory stays proportional to `chunk`.
+
+    Each chunk's probabilities are scaled by its largest before being
+    summed, and the sums are kept as logarithms, combined with logaddexp,
+    so joint probabilities too small for a float do not vanish.
+    """
+    family = Family(people)
+    n = len(family)
+    total = 3 ** n
+    if total >= 2 ** 63:
+        raise ValueError(f"too many assignments to enumerate for {n} people")
+
+    powers = 3 ** np.arange(n, dtype=np.int64)
+    slots = 3 * np.arange(n)
+    gene_totals = np.full(3 * n, -np.inf)
+    trait_totals = np.full((2, n), -np.inf)
+    for start in range(0, total, chunk):
+        numbers = np.arange(start, min(start + chunk, total), dtype=np.int64)
+        genes = numbers[:, None] // powers % 3
+
+        log_p = joint_log_probabilities(family, genes, family.trait)
+        scale = log_p.max()
+        if scale == -np.inf:
+            continue
+        p = np.exp(log_p - scale)
+        weights = np.broadcast_to(p[:, None], genes.shape).ravel()
+        with np.errstate(divide="ignore"):
+            gene_totals = np.logaddexp(gene_totals, scale + np.log(np.bincount(
+                (genes + slots).ravel(), weights=weights, minlength=3 * n)))
+            for value in (0, 1):
+                trait_totals[value] = np.logaddexp(
+                    trait_totals[value],
+                    scale + np.log(p @ np.where(family.trait < 0,
+                                                TRAIT[genes, value],
+                                                family.trait == value)))
+
+    gene_totals = gene_totals.reshape(n, 3)
+    log_probabilities = {
+        person: {
+            "gene": {g: float(gene_totals[i, g]) for g in (2, 1, 0)},
+            "trait": {True: float(trait_totals[1, i]),
+                      False: float(trait_totals[0, i])}
+        }
+        for i, person in enumerate(family.names)
+    }
+    return log_normalize(log_probabilities)
+
 
-    # Print results
+def elimination_probabilities(people):
+    """
+    Compute everyone's gene and trait distributions exactly by variable
+    elimination (see elimination.py), in time linear in the number of
+    people for families without many intermarriages.
+    """
+    evidence = {
+        person: TRAIT[:, int(people[person]["trait"])]
+        for person in people if people[person]["trait"] is not None
+    }
+    marginals = gene_marginals(people, GENE, INHERITANCE, evidence)
+
+    probabilities = dict()
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        gene = marginals[person]
+        if people[person]["trait"] is None:
+            have_trait = float(gene @ TRAIT[:, 1])
+        else:
+            have_trait = float(people[person]["trait"])
+        probabilities[person] = {
+            "gene": {g: float(gene[g]) for g in (2, 1, 0)},
+            "trait": {True: have_trait, False: 1 - have_trait}
+        }
+    return probabilities
+
+
+def sampled_probabilities(people, method="likelihood-weighting",
+                          samples=SAMPLES, chains=CHAINS, seed=None):
+    """
+    Estimate everyone's gene and trait distributions by drawing
+    `samples` samples of everyone's genes, by likelihood weighting or
+    Gibbs sampling (see sampling.py), with traits nobody knows summed
+    out analytically.
+
+    Return a tuple of the distributions and, in the same form, the
+    standard error of each estimate (0 for known traits, NaN where the
+    samples cannot estimate it).
+    """
+    family = Family(people)
+    likelihood = np.where((family.trait < 0)[:, None], 1.0,
+                          TRAIT[:, np.maximum(family.trait, 0)].T)
+    features = np.column_stack((np.eye(3), TRAIT[:, 1]))
+    if method == "gibbs":
+        means, errors = gibbs_sampling(family, GENE, INHERITANCE, likelihood,
+                                       features, samples, chains, seed=seed)
+    else:
+        means, errors = likelihood_weighting(family, GENE, INHERITANCE,
+                                             likelihood, features, samples,
+                                             seed=seed)
+
+    probabilities = dict()
+    standard_errors = dict()
+    for i, person in enumerate(family.names):
+        if family.trait[i] < 0:
+            have_trait, trait_error = float(means[i, 3]), float(errors[i, 3])
+        else:
+            have_trait, trait_error = float(family.trait[i]), 0.0
+        probabilities[person] = {
+            "gene": {g: float(means[i, g]) for g in (2, 1, 0)},
+            "trait": {True: have_trait, False: 1 - have_trait}
+        }
+        standard_errors[person] = {
+            "gene": {g: float(errors[i, g]) for g in (2, 1, 0)},
+            "trait": {True: trait_error, False: trait_error}
+        }
+    return probabilities, standard_errors
+
+
+def inheritance_table(mutation):
+    """
+    Return the 3x3x3 table of the probability that a child has 0, 1 or 2
+    copies of the gene given their mother's and father's copies, indexed
+    [mother genes, father genes, child genes].
+
+    A parent with 2 copies passes the gene on with probability
+    1 - mutation, one with 1 copy with probability 0.5, and one with no
+    copies with probability mutation.
+    """
+    passes = np.array([mutation, 0.5, 1 - mutation])
+    passed = np.stack([1 - passes, passes], axis=1)
+    table = np.zeros((3, 3, 3))
+    for mother in range(2):
+        for father in range(2):
+            table[:, :, mother + father] += np.outer(passed[:, mother],
+                                                     passed[:, father])
+    return table
+
+
+# P(genes) of people without parents, P(child genes | mother, father)
+# and P(trait | genes), as arrays indexed by numbers of copies of the gene
+# (and by trait, False then True)
+GENE = np.array([PROBS["gene"][genes] for genes in range(3)])
+INHERITANCE = inheritance_table(PROBS["mutation"])
+TRAIT = np.array([[PROBS["trait"][genes][False], PROBS["trait"][genes][True]]
+                  for genes in range(3)])
+
+# The same tables as logarithms
+LOG_GENE = np.log(GENE)
+LOG_INHERITANCE = np.log(INHERITANCE)
+LOG_TRAIT = np.log(TRAIT)
 
 
 def load_data(filename):
@@ -119,6 +381,32 @@ def load_data(filename):
     return data
 
 
+def family_components(people):
+    """
+    Split `people` into unrelated families: the connected components of
+    the graph linking every child to their parents. Return a list of
+    dictionaries in the form of `people`, keeping its order within each
+    family, and ordered by each family's first person.
+    """
+    root = {person: person for person in people}
+
+    def find(person):
+        while root[person] != person:
+            root[person] = root[root[person]]
+            person = root[person]
+        return person
+
+    for person in people:
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                root[find(person)] = find(parent)
+
+    components = dict()
+    for person in people:
+        components.setdefault(find(person), dict())[person] = people[person]
+    return list(components.values())
+
+
 def powerset(s):
     """
     Return a list of all possible subsets of set s.
@@ -142,108 +430,77 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
-    joint_prob = []
+    family = Family(people)
+    genes = np.array([2 if person in two_genes else 1 if person in one_gene else 0
+                      for person in family.names])
+    traits = np.array([person in have_trait for person in family.names])
+    return joint_probabilities(family, genes, traits)
 
-    for person in people:
-        if person in one_gene:
-            if people[person]['father'] is None and people[person]['mother'] is None:
-                gene_prob = PROBS['gene'][1]
-            else:
-                mother_genes = 0
-                father_genes = 0
-
-                if people[person]['father'] in one_gene:
-                    father_genes = 1
-                elif people[person]['father'] in two_genes:
-                    father_genes = 2
-                if people[person]['mother'] in one_gene:
-                    mother_genes = 1
-                elif people[person]['mother'] in two_genes:
-                    mother_genes = 2
-
-                if father_genes == mother_genes == 0:
-                    gene_prob = 2*(PROBS['mutation']*(1-PROBS['mutation']))
-                elif father_genes == mother_genes == 1:
-                    gene_prob = 2*((1-PROBS['mutation'])*1/2*(1-PROBS['mutation'])*1/2) + 4*((1-PROBS['mutation'])*1/2*PROBS['mutation']*1/2)
-                elif father_genes == mother_genes == 2:
-                    gene_prob = 2*(PROBS['mutation']*(1-PROBS['mutation']))
-                elif father_genes + mother_genes == 1 or father_genes + mother_genes == 3:
-                    gene_prob = 2*(PROBS['mutation']*(1-PROBS['mutation'])*1/2) + PROBS['mutation']*PROBS['mutation']*1/2 + (1-PROBS['mutation'])*(1-PROBS['mutation'])*1/2
-                elif father_genes + mother_genes == 2:
-                    gene_prob = PROBS['mutation']*PROBS['mutation'] + (1-PROBS['mutation'])*(1-PROBS['mutation'])
-
-            if person in have_trait:
-                joint_prob.append(gene_prob*PROBS['trait'][1][True])
-            else:
-                joint_prob.append(gene_prob*PROBS['trait'][1][False])
-        elif person in two_genes:
-            if people[person]['father'] is None and people[person]['mother'] is None:
-                gene_prob = PROBS['gene'][2]
-            else:
-                mother_genes = 0
-                father_genes = 0
-
-                if people[person]['father'] in one_gene:
-                    father_genes += 1
-                elif people[person]['father'] in two_genes:
-                    father_genes = 2
-                if people[person]['mother'] in one_gene:
-                    mother_genes = 1
-                elif people[person]['mother'] in two_genes:
-                    mother_genes = 2
-
-                if father_genes == mother_genes == 0:
-                    gene_prob = PROBS['mutation']*PROBS['mutation']
-                elif father_genes == mother_genes == 1:
-                    gene_prob = (1-PROBS['mutation'])*1/2*(1-PROBS['mutation'])*1/2 + PROBS['mutation']*1/2*PROBS['mutation']*1/2 + 2*((1-PROBS['mutation'])*1/2*PROBS['mutation']*1/2)
-                elif father_genes == mother_genes == 2:
-                    gene_prob = (1-PROBS['mutation'])*(1-PROBS['mutation'])
-                elif father_genes + mother_genes == 1:
-                    gene_prob = PROBS['mutation']*PROBS['mutation']*1/2 + PROBS['mutation']*(1-PROBS['mutation'])*1/2
-                elif father_genes + mother_genes == 3:
-                    gene_prob = (1-PROBS['mutation'])*(1-PROBS['mutation'])*1/2 + PROBS['mutation']*(1-PROBS['mutation'])*1/2
-                elif father_genes + mother_genes == 2:
-                    gene_prob = PROBS['mutation']*(1-PROBS['mutation'])
-                
-            if person in have_trait:
-                joint_prob.append(gene_prob*PROBS['trait'][2][True])
-            else:
-                joint_prob.append(gene_prob*PROBS['trait'][2][False])
-        else:
-            if people[person]['father'] is None and people[person]['mother'] is None:
-                gene_prob = PROBS['gene'][0]
-            else:
-                mother_genes = 0
-                father_genes = 0
-
-                if people[person]['father'] in one_gene:
-                    father_genes = 1
-                elif people[person]['father'] in two_genes:
-                    father_genes = 2
-                if people[person]['mother'] in one_gene:
-                    mother_genes = 1
-                elif people[person]['mother'] in two_genes:
-                    mother_genes = 2
-
-                if father_genes == mother_genes == 0:
-                    gene_prob = (1-PROBS['mutation'])*(1-PROBS['mutation'])
-                elif father_genes == mother_genes == 1:
-                    gene_prob = (1-PROBS['mutation'])*1/2*(1-PROBS['mutation'])*1/2 + PROBS['mutation']*1/2*PROBS['mutation']*1/2 + 2*((1-PROBS['mutation'])*1/2*PROBS['mutation']*1/2)
-                elif father_genes == mother_genes == 2:
-                    gene_prob = PROBS['mutation']*PROBS['mutation']
-                elif father_genes + mother_genes == 1:
-                    gene_prob = (1-PROBS['mutation'])*(1-PROBS['mutation'])*1/2 + PROBS['mutation']*(1-PROBS['mutation'])*1/2
-                elif father_genes + mother_genes == 3:
-                    gene_prob = PROBS['mutation']*PROBS['mutation']*1/2 + PROBS['mutation']*(1-PROBS['mutation'])*1/2
-                elif father_genes + mother_genes == 2:
-                    gene_prob = PROBS['mutation']*(1-PROBS['mutation'])
-            
-            if person in have_trait:
-                joint_prob.append(gene_prob*PROBS['trait'][0][True])
-            else:
-                joint_prob.append(gene_prob*PROBS['trait'][0][False])
-
-    return np.prod(joint_prob)
+
+class Family():
+    """
+    A family encoded as arrays, with everyone numbered in the order of
+    `people` as returned by `load_data`:
+        * `mother` and `father` hold the number of each person's parents,
+          or -1 for people without parents, and
+        * `trait` holds 1 or 0 for people known to have the trait or not,
+          and -1 where it is unknown.
+    """
+
+    def __init__(self, people):
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.mother = np.array([index.get(people[name]["mother"], -1)
+                                for name in self.names], dtype=np.intp)
+        self.father = np.array([index.get(people[name]["father"], -1)
+                                for name in self.names], dtype=np.intp)
+        self.founder = (self.mother < 0) | (self.father < 0)
+        self.trait = np.array([-1 if people[name]["trait"] is None
+                               else int(people[name]["trait"])
+                               for name in self.names], dtype=np.int8)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def joint_probabilities(family, genes, traits):
+    """
+    Return the joint probability of every assignment of genes and traits
+    to a Family, all computed at once.
+
+    `genes` is an integer array of shape (..., N), holding each person's
+    number of copies of the gene, and `traits` an array of the same
+    shape (or one broadcastable to it) saying whether they have the
+    trait, as booleans or as 1 and 0; -1 marks a trait that is summed
+    out, contributing a factor of 1. The result has shape (...). Each
+    person's factor is looked up in GENE, INHERITANCE and TRAIT, and the
+    factors are multiplied together.
+    """
+    genes = np.asarray(genes)
+    traits = np.asarray(traits, dtype=np.intp)
+    mothers = genes[..., np.maximum(family.mother, 0)]
+    fathers = genes[..., np.maximum(family.father, 0)]
+    factors = np.where(family.founder, GENE[genes],
+                       INHERITANCE[mothers, fathers, genes])
+    factors *= np.where(traits < 0, 1, TRAIT[genes, traits])
+    return factors.prod(axis=-1)
+
+
+def joint_log_probabilities(family, genes, traits):
+    """
+    Return the logarithm of the joint probability of every assignment of
+    genes and traits to a Family, with the same arguments as
+    `joint_probabilities`, summing the logarithms of each person's
+    factors from LOG_GENE, LOG_INHERITANCE and LOG_TRAIT.
+    """
+    genes = np.asarray(genes)
+    traits = np.asarray(traits, dtype=np.intp)
+    mothers = genes[..., np.maximum(family.mother, 0)]
+    fathers = genes[..., np.maximum(family.father, 0)]
+    factors = np.where(family.founder, LOG_GENE[genes],
+                       LOG_INHERITANCE[mothers, fathers, genes])
+    factors += np.where(traits < 0, 0, LOG_TRAIT[genes, traits])
+    return factors.sum(axis=-1)
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
@@ -267,6 +524,29 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
             probabilities[person]['trait'][False] += p
 
 
+def log_update_genes(log_probabilities, family, genes, log_p):
+    """
+    Add to `log_probabilities` the joint probability, given as its
+    logarithm `log_p`, of a Family having `genes` and its known traits.
+    Each person's gene distribution is updated for their genes, and their
+    trait distribution for their trait if known, or else split between
+    having the trait and not by the probability of the trait given their
+    genes.
+    """
+    for person, gene, trait in zip(family.names, genes, family.trait.tolist()):
+        distribution = log_probabilities[person]['gene']
+        distribution[gene] = np.logaddexp(distribution[gene], log_p)
+        distribution = log_probabilities[person]['trait']
+        if trait < 0:
+            distribution[True] = np.logaddexp(distribution[True],
+                                              log_p + LOG_TRAIT[gene, 1])
+            distribution[False] = np.logaddexp(distribution[False],
+                                               log_p + LOG_TRAIT[gene, 0])
+        else:
+            distribution[bool(trait)] = np.logaddexp(distribution[bool(trait)],
+                                                     log_p)
+
+
 def normalize(probabilities):
     """
     Update `probabilities` such that each probability distribution
@@ -284,5 +564,33 @@ def normalize(probabilities):
         probabilities[person]['trait'] = {k:alpha*v for k, v in probabilities[person]['trait'].items()}
 
 
+def log_normalize(log_probabilities):
+    """
+    Return the normalized probability distributions of
+    `log_probabilities`, whose values are logarithms of unnormalized
+    probabilities, normalizing each by its logsumexp.
+    """
+    return {
+        person: {
+            field: dict(zip(distribution, np.exp(
+                np.array(list(distribution.values()))
+                - logsumexp(list(distribution.values()))).tolist()))
+            for field, distribution in log_probabilities[person].items()
+        }
+        for person in log_probabilities
+    }
+
+
+def logsumexp(values):
+    """
+    Return log(sum(exp(values))), computed without overflow or underflow.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = values.max()
+    if scale == -np.inf:
+        raise ValueError("every probability is 0; the evidence is impossible")
+    return scale + np.log(np.exp(values - scale).sum())
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,207 @@
+import warnings
+
+import numpy as np
+
+# Genes (samples times people) drawn at once by likelihood weighting
+BATCH = 1 << 20
+
+# Effective sample size below which likelihood weighting's weights are
+# too concentrated for its standard errors to mean anything
+MIN_EFFECTIVE_SAMPLES = 1000
+
+
+def likelihood_weighting(family, prior, inheritance, likelihood, features,
+                         samples, seed=None):
+    """
+    Estimate the expected `features` of everyone's genes in a family,
+    given evidence, by likelihood weighting.
+
+    `family` has arrays `mother` and `father` (each person's parents'
+    numbers, -1 for people without parents) and `founder`. Genes are
+    drawn from `prior` for people without parents and from
+    `inheritance[mother genes, father genes]` otherwise, everyone in
+    order of descent, BATCH genes at a time; each sample is
+    weighted by the `likelihood` (an N x 3 array) of the evidence given
+    the genes drawn. `features` is a 3 x F array of values of each
+    number of copies of the gene, such as indicators of each number, or
+    the probability of a trait.
+
+    Return a tuple of N x F arrays: the weighted means of the features,
+    and their standard errors, estimated from the spread of the weights.
+    On large families the weights tend to collapse onto a few samples;
+    if the effective sample size, (sum w)^2 / sum w^2, falls below
+    MIN_EFFECTIVE_SAMPLES, a RuntimeWarning is issued and the standard
+    errors are NaN.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(family.mother)
+    order = descent_order(family)
+    likelihood = np.asarray(likelihood, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        log_likelihood = np.log(likelihood)
+
+    # Weighted sums of the features, their squares, and the weights, all
+    # relative to exp(scale) so that tiny weights do not underflow
+    scale = -np.inf
+    total = 0.0
+    total_squares = 0.0
+    sums = np.zeros((n, features.shape[1]))
+    weighted_squares = np.zeros_like(sums)
+    squared_sums = np.zeros_like(sums)
+    batch = max(1, BATCH // max(n, 1))
+    for start in range(0, samples, batch):
+        size = min(batch, samples - start)
+        genes = np.empty((size, n), dtype=np.intp)
+        for i in order:
+            if family.founder[i]:
+                p = np.broadcast_to(prior, (size, 3))
+            else:
+                p = inheritance[genes[:, family.mother[i]], genes[:, family.father[i]]]
+            genes[:, i] = draw(rng, p)
+
+        log_weights = log_likelihood[np.arange(n), genes].sum(axis=1)
+        batch_scale = log_weights.max()
+        if batch_scale == -np.inf:
+            continue
+        if batch_scale > scale:
+            shrink = np.exp(scale - batch_scale)
+            total *= shrink
+            total_squares *= shrink ** 2
+            sums *= shrink
+            weighted_squares *= shrink ** 2
+            squared_sums *= shrink ** 2
+            scale = batch_scale
+        weights = np.exp(log_weights - scale)
+
+        total += weights.sum()
+        total_squares += weights @ weights
+        for value in range(3):
+            chosen = genes == value
+            weight = weights @ chosen
+            square = (weights ** 2) @ chosen
+            sums += np.outer(weight, features[value])
+            weighted_squares += np.outer(square, features[value])
+            squared_sums += np.outer(square, features[value] ** 2)
+
+    if total == 0:
+        raise ValueError("no sample is consistent with the evidence")
+    means = sums / total
+
+    effective = total ** 2 / total_squares
+    if effective < MIN_EFFECTIVE_SAMPLES:
+        warnings.warn(
+            f"likelihood weighting kept an effective sample size of only "
+            f"{effective:.0f} of {samples} samples; its estimates are "
+            f"unreliable, use Gibbs sampling or elimination instead",
+            RuntimeWarning, stacklevel=2)
+        return means, np.full_like(means, np.nan)
+
+    # Self-normalized importance sampling: the variance of the mean is
+    # about sum(w^2 (x - mean)^2) / sum(w)^2
+    variance = (squared_sums - 2 * means * weighted_squares
+                + means ** 2 * total_squares) / total ** 2
+    return means, np.sqrt(np.maximum(variance, 0))
+
+
+def gibbs_sampling(family, prior, inheritance, likelihood, features, samples,
+                   chains=1000, burn_in=100, seed=None):
+    """
+    Estimate the expected `features` of everyone's genes in a family,
+    given evidence, by Gibbs sampling, with the same arguments as
+    `likelihood_weighting`.
+
+    `chains` chains are run at once, as arrays. Each sweep redraws every
+    person's genes, in order of descent, from their distribution given
+    everyone else's: their parents' genes (or `prior`), the `likelihood`
+    of their evidence, and their children's genes given the genes of
+    the children's other parents. After `burn_in` sweeps, sweeps
+    continue until `samples` draws (chains times sweeps) have been made.
+    Each person's features are averaged over their conditional
+    distributions rather than over the genes drawn, which reduces the
+    variance.
+
+    Return a tuple of N x F arrays: the means of the features over every
+    chain, and their standard errors, estimated from the spread of the
+    means of the individual chains.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(family.mother)
+    order = descent_order(family)
+    likelihood = np.asarray(likelihood, dtype=np.float64)
+    sweeps = max(1, -(-samples // chains))
+
+    # Each person's children, with whether the person is their mother
+    children = [[] for _ in range(n)]
+    for child in range(n):
+        if not family.founder[child]:
+            children[family.mother[child]].append((child, True))
+            children[family.father[child]].append((child, False))
+
+    # Start from genes drawn from the prior of the whole family
+    genes = np.empty((chains, n), dtype=np.intp)
+    for i in order:
+        if family.founder[i]:
+            p = np.broadcast_to(prior, (chains, 3))
+        else:
+            p = inheritance[genes[:, family.mother[i]], genes[:, family.father[i]]]
+        genes[:, i] = draw(rng, p)
+
+    sums = np.zeros((chains, n, features.shape[1]))
+    for sweep in range(burn_in + sweeps):
+        for i in order:
+            if family.founder[i]:
+                p = np.broadcast_to(prior * likelihood[i], (chains, 3))
+            else:
+                p = (inheritance[genes[:, family.mother[i]], genes[:, family.father[i]]]
+                     * likelihood[i])
+            for child, is_mother in children[i]:
+                if is_mother:
+                    other = genes[:, family.father[child]]
+                    p = p * inheritance[:, other, genes[:, child]].T
+                else:
+                    other = genes[:, family.mother[child]]
+                    p = p * inheritance[other, :, genes[:, child]]
+            p = p / p.sum(axis=1, keepdims=True)
+            genes[:, i] = draw(rng, p)
+            if sweep >= burn_in:
+                sums[:, i] += p @ features
+
+    chain_means = sums / sweeps
+    means = chain_means.mean(axis=0)
+    if chains < 2:
+        return means, np.full_like(means, np.nan)
+    return means, chain_means.std(axis=0, ddof=1) / np.sqrt(chains)
+
+
+def descent_order(family):
+    """
+    Return everyone's number in an order where parents come before
+    their children.
+    """
+    n = len(family.mother)
+    order = []
+    placed = np.zeros(n, dtype=bool)
+    remaining = list(range(n))
+    while remaining:
+        waiting = []
+        for i in remaining:
+            if family.founder[i] or (placed[family.mother[i]]
+                                     and placed[family.father[i]]):
+                order.append(i)
+                placed[i] = True
+            else:
+                waiting.append(i)
+        if len(waiting) == len(remaining):
+            raise ValueError("family tree has a cycle")
+        remaining = waiting
+    return order
+
+
+def draw(rng, p):
+    """
+    Draw one value from each row of `p`, an array of distributions over
+    0, 1 and 2 (which need not be normalized).
+    """
+    cumulative = np.cumsum(p, axis=1)
+    u = rng.random(len(p)) * cumulative[:, -1]
+    return (u[:, None] >= cumulative[:, :-1]).sum(axis=1)
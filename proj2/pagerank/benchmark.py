@@ -0,0 +1,298 @@
+import argparse
+import resource
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from linkgraph import EdgeFile, LinkGraph
+from pagerank import (DAMPING, NORMS, SAMPLES, SOLVERS, DIRECT_LIMIT,
+                      iterate_pagerank, out_of_core_pagerank,
+                      personalized_iteration, power_iteration, push_iteration,
+                      sample_pagerank, sample_ranks, solve_pagerank,
+                      warm_start)
+from synthetic import synthetic_graph, write_synthetic_edges
+
+SCALING_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark PageRank computations on random graphs.")
+    parser.add_argument("--pages", type=int, default=100000)
+    parser.add_argument("--degree", type=float, default=8,
+                        help="mean number of links per page")
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    update = commands.add_parser(
+        "update", help="compare warm-started updates after random link "
+                       "edits with recomputing from scratch")
+    update.add_argument("--edits", type=int, default=100,
+                        help="links added and removed per update")
+
+    solvers = commands.add_parser(
+        "solvers", help="compare the solvers of solve_pagerank")
+    solvers.add_argument("--norm", choices=NORMS, default="l1")
+    solvers.add_argument("--solvers", nargs="+", choices=SOLVERS,
+                         default=list(SOLVERS))
+
+    personalized = commands.add_parser(
+        "personalized", help="compare personalized PageRank for many "
+                             "teleport vectors at once with one at a time")
+    personalized.add_argument("--vectors", type=int, default=32,
+                              help="number of teleport vectors")
+    personalized.add_argument("--focus", type=int, default=100,
+                              help="pages each teleport vector favours")
+
+    outofcore = commands.add_parser(
+        "outofcore", help="iterate PageRank over a synthetic web graph "
+                          "stored as a memory-mapped edge list")
+    outofcore.add_argument("--budget", type=float, default=64,
+                           help="memory budget in MiB")
+    outofcore.add_argument("--dtype", choices=["float64", "float32"],
+                           default="float64", help="type of the rank vectors")
+    outofcore.add_argument("--directory",
+                           help="where to write the edge list "
+                                "(default: a temporary directory)")
+    outofcore.add_argument("--exact-limit", type=int, default=10 ** 6,
+                           help="compare with in-memory power iteration "
+                                "up to this many pages")
+
+    scaling = commands.add_parser(
+        "scaling", help="compare the time, memory and error of sampling and "
+                        "iteration on synthetic web graphs of growing size")
+    scaling.add_argument("--sizes", nargs="+", type=int, default=SCALING_SIZES,
+                         help="numbers of pages (--pages is ignored)")
+    scaling.add_argument("--samples-per-page", type=float, default=100,
+                         help="random surfer steps per page when sampling")
+    scaling.add_argument("--exponent", type=float, default=2.1,
+                         help="power-law exponent of the out-degrees")
+    scaling.add_argument("--dangling", type=float, default=0.1,
+                         help="fraction of pages without links")
+    scaling.add_argument("--components", type=int, default=1,
+                         help="number of disconnected groups of pages")
+    scaling.add_argument("--reference-limit", type=int, default=0,
+                         help="also time sample_pagerank and iterate_pagerank "
+                              "up to this many pages (they take over a "
+                              "minute at 1000 pages)")
+
+    args = parser.parse_args()
+    if args.command == "scaling":
+        benchmark_scaling(args)
+        return
+    if args.command == "outofcore":
+        if args.directory:
+            benchmark_out_of_core(args, args.directory)
+        else:
+            with tempfile.TemporaryDirectory() as directory:
+                benchmark_out_of_core(args, directory)
+        return
+    rng = np.random.default_rng(args.seed)
+    graph = random_graph(args.pages, args.degree, rng)
+    if args.command == "update":
+        benchmark_update(graph, args.edits, args.tolerance, rng)
+    elif args.command == "personalized":
+        benchmark_personalized(graph, args.vectors, args.focus,
+                               args.tolerance, rng)
+    else:
+        benchmark_solvers(graph, args.solvers, args.tolerance, args.norm)
+
+
+def benchmark_update(graph, edits, tolerance, rng):
+    """
+    Time recomputing PageRank after removing `edits` random links from
+    `graph` and adding as many, from scratch and warm-started.
+    """
+    ranks, _ = power_iteration(graph, DAMPING, tolerance)
+
+    removed = rng.choice(graph.edges, size=edits, replace=False)
+    sources = np.repeat(np.arange(len(graph)), graph.out_degree)
+    removed_links = [(graph.pages[sources[k]], graph.pages[graph.out_indices[k]])
+                     for k in removed]
+    added_links = [(graph.pages[i], graph.pages[j])
+                   for i, j in rng.integers(len(graph), size=(edits, 2))]
+
+    start = time.perf_counter()
+    edited, old_ids = graph.edit(added_links=added_links,
+                                 removed_links=removed_links)
+    print(f"{'edit graph':18} {time.perf_counter() - start:8.3f}s")
+
+    start = time.perf_counter()
+    exact, iterations = power_iteration(edited, DAMPING, tolerance)
+    report("cold start", time.perf_counter() - start, iterations, exact, exact)
+
+    for name, solve in [("warm start", power_iteration),
+                        ("warm start, push", push_iteration)]:
+        start = time.perf_counter()
+        updated, iterations = solve(edited, DAMPING, tolerance,
+                                    warm_start(ranks, old_ids))
+        report(name, time.perf_counter() - start, iterations, updated, exact)
+
+
+def benchmark_solvers(graph, solvers, tolerance, norm):
+    """
+    Time each of `solvers` on `graph`, measuring their error against a
+    tightly converged power iteration.
+    """
+    exact, _ = solve_pagerank(graph, DAMPING, tolerance=1e-12,
+                              max_iterations=10000)
+    for solver in solvers:
+        if solver == "direct" and len(graph) > DIRECT_LIMIT:
+            print(f"{solver:18} skipped, graph larger than {DIRECT_LIMIT} pages")
+            continue
+        start = time.perf_counter()
+        ranks, residuals = solve_pagerank(graph, DAMPING, solver, tolerance, norm)
+        report(solver, time.perf_counter() - start, len(residuals),
+               ranks, exact)
+
+
+def benchmark_personalized(graph, vectors, focus, tolerance, rng):
+    """
+    Time personalized PageRank for `vectors` random teleport vectors,
+    each spread evenly over `focus` random pages, computed together as
+    one matrix and one vector at a time.
+    """
+    teleport = np.zeros((len(graph), vectors))
+    for k in range(vectors):
+        teleport[rng.choice(len(graph), size=min(focus, len(graph)),
+                            replace=False), k] = 1
+    teleport /= teleport.sum(axis=0)
+
+    start = time.perf_counter()
+    batched, iterations = personalized_iteration(graph, DAMPING, teleport,
+                                                 tolerance)
+    print(f"{'batched':18} {time.perf_counter() - start:8.3f}s "
+          f"{iterations:4} iterations")
+
+    start = time.perf_counter()
+    iterations = 0
+    error = 0
+    for k in range(vectors):
+        ranks, count = personalized_iteration(graph, DAMPING, teleport[:, k],
+                                              tolerance)
+        iterations += count
+        error = max(error, np.abs(ranks - batched[:, k]).sum())
+    print(f"{'one at a time':18} {time.perf_counter() - start:8.3f}s "
+          f"{iterations:4} iterations  max L1 difference {error:.2e}")
+
+
+def benchmark_out_of_core(args, directory):
+    """
+    Write a synthetic web graph of `args.pages` pages to `directory` as
+    an edge list, then time out-of-core PageRank on it within a budget of
+    `args.budget` MiB, reporting the peak memory allocated (as traced by
+    tracemalloc) and the process' peak resident set size.
+    """
+    start = time.perf_counter()
+    write_synthetic_edges(directory, args.pages, args.degree, seed=args.seed)
+    print(f"{'write edge list':18} {time.perf_counter() - start:8.3f}s")
+
+    budget = int(args.budget * 2 ** 20)
+    tracemalloc.start()
+    (ranks, iterations), seconds, memory = measure(
+        out_of_core_pagerank, directory, DAMPING, args.tolerance, budget,
+        np.dtype(args.dtype))
+    tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+    print(f"{'out of core':18} {seconds:8.3f}s {iterations:4} iterations  "
+          f"peak {memory / 2 ** 20:.1f} MiB of {args.budget:g} MiB budget, "
+          f"peak RSS {peak_rss:.1f} MiB")
+
+    if args.pages <= args.exact_limit:
+        with EdgeFile(directory) as edges:
+            graph = LinkGraph(range(edges.pages), edges.sources[1],
+                              edges.targets[1])
+        exact, _ = solve_pagerank(graph, DAMPING, tolerance=1e-12,
+                                  max_iterations=10000)
+        print(f"{'':18} L1 error {np.abs(ranks - exact).sum():.2e}")
+
+
+def benchmark_scaling(args):
+    """
+    For each of `args.sizes`, generate a synthetic web graph and compare
+    sampling and power iteration, and for graphs of up to
+    `args.reference_limit` pages, sample_pagerank and iterate_pagerank,
+    by time, peak memory allocated (as traced by tracemalloc) and L1
+    error against a tightly converged power iteration.
+    """
+    tracemalloc.start()
+    for n in args.sizes:
+        graph, seconds, memory = measure(
+            synthetic_graph, n, args.degree, args.exponent, args.dangling,
+            args.components, seed=args.seed)
+        print(f"{n} pages, {graph.edges} links, "
+              f"{graph.dangling.sum()} without links")
+        print(f"  {'generate':26} {seconds:8.3f}s {memory / 2 ** 20:9.1f} MiB")
+        exact, _ = solve_pagerank(graph, DAMPING, tolerance=1e-10,
+                                  max_iterations=10000)
+
+        samples = int(n * args.samples_per_page)
+        runs = [
+            (f"sample_ranks ({samples})",
+             lambda graph=graph: sample_ranks(graph, DAMPING, samples,
+                                              surfers=10000, seed=args.seed)),
+            ("power_iteration",
+             lambda graph=graph: power_iteration(graph, DAMPING,
+                                                 args.tolerance)[0])
+        ]
+        if n <= args.reference_limit:
+            corpus = graph.to_corpus()
+            runs += [
+                (f"sample_pagerank ({SAMPLES})",
+                 lambda graph=graph: as_vector(
+                     graph, sample_pagerank(corpus, DAMPING, SAMPLES))),
+                ("iterate_pagerank",
+                 lambda graph=graph: as_vector(
+                     graph, iterate_pagerank(corpus, DAMPING)))
+            ]
+
+        for name, run in runs:
+            ranks, seconds, memory = measure(run)
+            error = np.abs(ranks - exact).sum()
+            print(f"  {name:26} {seconds:8.3f}s {memory / 2 ** 20:9.1f} MiB  "
+                  f"L1 error {error:.2e}")
+        # Free this graph before generating the next one
+        del graph, exact, runs
+    tracemalloc.stop()
+
+
+def measure(function, *args, **kwargs):
+    """
+    Call `function` and return a tuple of its result, the seconds it took
+    and the peak memory in bytes traced by tracemalloc during the call.
+    """
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    return result, seconds, tracemalloc.get_traced_memory()[1] - baseline
+
+
+def as_vector(graph, ranks):
+    """Convert a dictionary of ranks by page to a vector in graph order."""
+    return np.array([ranks.get(page, 0) for page in graph.pages])
+
+
+def random_graph(n, degree, rng):
+    """
+    Return a LinkGraph of n pages, each linking to a Poisson-distributed
+    number of pages (with mean `degree`) chosen uniformly at random.
+    """
+    counts = rng.poisson(degree, size=n)
+    sources = np.repeat(np.arange(n), counts)
+    targets = rng.integers(n, size=counts.sum())
+    return LinkGraph([f"{i}.html" for i in range(n)], sources, targets)
+
+
+def report(name, seconds, iterations, ranks, exact):
+    error = np.abs(ranks - exact).sum()
+    print(f"{name:18} {seconds:8.3f}s {iterations:4} iterations  "
+          f"L1 error {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,561 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+# Same pattern as `crawl`, matched against raw bytes
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Files at least this large are scanned through a memory map
+MMAP_THRESHOLD = 1 << 20
+
+# Directory (under $XDG_CACHE_HOME, or ~/.cache) and format version of
+# the link-graph caches written by `load_graph`
+CACHE_DIRECTORY = "pagerank"
+CACHE_VERSION = 1
+
+# Files of an out-of-core edge list written by `write_edges`: a JSON
+# header, then int32 link sources (sorted), link targets and out-degrees
+EDGE_HEADER = "edges.json"
+EDGE_SOURCES = "sources.int32"
+EDGE_TARGETS = "targets.int32"
+EDGE_DEGREES = "degrees.int32"
+EDGE_VERSION = 1
+
+
+class LinkGraph():
+    """
+    Compact representation of a corpus' link graph.
+
+    Pages are interned to integer ids (their index in `pages`), and links
+    are stored as arrays in compressed sparse row (CSR) form twice:
+        * by source page, as `out_indptr` and `out_indices`, and
+        * by target page, as `in_indptr`, `in_indices` and `in_weights`,
+          which is the column-stochastic transition matrix M, where
+          M[i, j] = 1 / out_degree[j] whenever page j links to page i.
+
+    The same matrix is also kept as a SciPy CSR matrix, `transition`,
+    sharing those arrays, to propagate ranks with sparse products.
+    """
+
+    def __init__(self, pages, sources, targets):
+        """
+        Build the graph of `pages` from parallel arrays of link `sources`
+        and `targets` (page ids). Self links and duplicates are dropped.
+        """
+        self.pages = list(pages)
+        self.ids = {page: i for i, page in enumerate(self.pages)}
+        n = len(self.pages)
+        index = np.int32 if n < 2 ** 31 else np.int64
+
+        # Sort links by source then target, dropping self links and repeats
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        keep = sources != targets
+        links = np.sort(sources[keep] * n + targets[keep])
+        links = links[np.diff(links, prepend=-1) != 0]
+        sources, targets = np.divmod(links, n)
+
+        self.out_degree = np.bincount(sources, minlength=n)
+        self.dangling = self.out_degree == 0
+        self.out_indptr = np.concatenate(([0], np.cumsum(self.out_degree)))
+        self.out_indices = targets.astype(index)
+
+        order = np.argsort(targets, kind="stable")
+        self.in_degree = np.bincount(targets, minlength=n)
+        self.in_indptr = np.concatenate(([0], np.cumsum(self.in_degree)))
+        self.in_indices = sources[order].astype(index)
+        self.in_rows = targets[order].astype(index)
+        self.in_weights = 1 / self.out_degree[self.in_indices]
+        self.transition = sparse.csr_matrix(
+            (self.in_weights, self.in_indices, self.in_indptr), shape=(n, n))
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build the graph of a corpus, as returned by `crawl`: a dictionary
+        mapping each page to the set of pages it links to.
+        """
+        pages = sorted(corpus)
+        ids = {page: i for i, page in enumerate(pages)}
+        sources = []
+        targets = []
+        for page in pages:
+            for link in corpus[page]:
+                if link in ids:
+                    sources.append(ids[page])
+                    targets.append(ids[link])
+        return cls(pages, sources, targets)
+
+    def to_corpus(self):
+        """
+        Return the graph as a dictionary mapping each page to the set of
+        pages it links to, as `crawl` does.
+        """
+        return {
+            page: {self.pages[j] for j in self.links(i)}
+            for i, page in enumerate(self.pages)
+        }
+
+    def __len__(self):
+        return len(self.pages)
+
+    @property
+    def edges(self):
+        """The number of links in the graph."""
+        return len(self.out_indices)
+
+    def links(self, i):
+        """Return the ids of the pages that page i links to."""
+        return self.out_indices[self.out_indptr[i]:self.out_indptr[i + 1]]
+
+    def edit(self, added_pages=(), removed_pages=(),
+             added_links=(), removed_links=()):
+        """
+        Return a tuple (graph, old_ids): a new LinkGraph with the given
+        pages and links, each link a (source, target) pair of page names,
+        added or removed, and for each page of the new graph its id in
+        this graph, or -1 if it is new.
+
+        Surviving pages keep their order, and new pages come after them.
+        Links to or from removed pages are removed as well.
+        """
+        removed_pages = set(removed_pages)
+        keep = np.ones(len(self), dtype=bool)
+        keep[[self.ids[page] for page in removed_pages if page in self.ids]] = False
+        kept = np.flatnonzero(keep)
+        new_pages = [page for page in dict.fromkeys(added_pages)
+                     if page not in self.ids or page in removed_pages]
+        pages = ([self.pages[i] for i in kept] if removed_pages
+                 else list(self.pages))
+        pages.extend(new_pages)
+        old_ids = np.concatenate((kept, np.full(len(new_pages), -1)))
+
+        # Renumber existing links, dropping those of removed pages
+        new_id = np.full(len(self), -1, dtype=np.int64)
+        new_id[kept] = np.arange(len(kept))
+        sources = new_id[np.repeat(np.arange(len(self)), self.out_degree)]
+        targets = new_id[self.out_indices]
+        valid = (sources >= 0) & (targets >= 0)
+        sources, targets = sources[valid], targets[valid]
+
+        new_ids = {page: len(kept) + i for i, page in enumerate(new_pages)}
+
+        def page_id(page):
+            if page in new_ids:
+                return new_ids[page]
+            i = new_id[self.ids[page]] if page in self.ids else -1
+            if i < 0:
+                raise KeyError(page)
+            return i
+
+        if removed_links:
+            removed = np.array([
+                page_id(source) * len(pages) + page_id(target)
+                for source, target in removed_links
+                if source not in removed_pages and target not in removed_pages
+            ], dtype=np.int64)
+            valid = ~np.isin(sources * len(pages) + targets, removed)
+            sources, targets = sources[valid], targets[valid]
+        if added_links:
+            added = np.array([(page_id(source), page_id(target))
+                              for source, target in added_links],
+                             dtype=np.int64).reshape(-1, 2)
+            sources = np.concatenate((sources, added[:, 0]))
+            targets = np.concatenate((targets, added[:, 1]))
+
+        return LinkGraph(pages, sources, targets), old_ids
+
+    def propagate(self, ranks):
+        """
+        Return M @ ranks: the rank each page receives from the pages that
+        link to it, when every page splits its rank evenly among its
+        links. Rank held by pages without links is not propagated.
+
+        `ranks` is either a vector, or an N x K matrix whose K columns
+        are propagated together, by one sparse-dense product that reads
+        every link once for all of them.
+        """
+        return self.transition @ ranks
+
+
+def crawl_graph(directory, workers=None, batch=256):
+    """
+    Parse a directory of HTML pages into a LinkGraph.
+
+    Files are parsed by a pool of `workers` threads, `batch` files per
+    task, extracting links incrementally as raw bytes (see `parse_pages`).
+    Page names are interned to integer ids up front, so every file's
+    links go straight into compact int32 arrays of sources and targets;
+    links to pages outside the corpus are dropped.
+    """
+    pages = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html") and entry.is_file()
+    )
+    ids = {os.fsencode(page): i for i, page in enumerate(pages)}
+
+    sources = array("i")
+    targets = array("i")
+    for i, links in enumerate(parse_pages(directory, pages, workers, batch)):
+        for link in links:
+            target = ids.get(link)
+            if target is not None:
+                sources.append(i)
+                targets.append(target)
+
+    return LinkGraph(pages, np.frombuffer(sources, dtype=np.int32),
+                     np.frombuffer(targets, dtype=np.int32))
+
+
+def parse_pages(directory, pages, workers=None, batch=256):
+    """
+    Yield the links of each of `pages` in `directory`, in order, as a
+    list of bytes per page. Files are parsed by a pool of `workers`
+    threads, `batch` files per task.
+    """
+    def parse(start):
+        return [list(read_links(os.path.join(directory, page)))
+                for page in pages[start:start + batch]]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for links in executor.map(parse, range(0, len(pages), batch)):
+            yield from links
+
+
+def read_links(path):
+    """
+    Yield the target of every link in the HTML file at `path`, as bytes.
+    Files of MMAP_THRESHOLD bytes or more are scanned through a memory
+    map rather than read into memory.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            yield from LINK.findall(f.read())
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for match in LINK.finditer(data):
+                yield match.group(1)
+
+
+def load_graph(directory, cache=None, workers=None):
+    """
+    Return the LinkGraph of a directory of HTML pages, reusing the links
+    parsed by previous calls.
+
+    The links of every file are cached on disk, in `cache` (by default
+    the file `default_cache` names for `directory`), along with the
+    file's modification time and size. Only files that are new or whose
+    time or size changed are parsed again, as by `crawl_graph`, with
+    `workers` threads; the cache is then patched and rewritten. Every
+    link is cached, including links to pages outside the corpus, so that
+    adding a page also picks up the existing links to it.
+
+    The cache is only an optimization: if it cannot be written, the
+    graph is returned all the same.
+    """
+    if cache is None:
+        cache = default_cache(directory)
+
+    entries = sorted(
+        (entry.name, entry.stat()) for entry in os.scandir(directory)
+        if entry.name.endswith(".html") and entry.is_file()
+    )
+    pages = np.array([name for name, _ in entries], dtype=str)
+    mtimes = np.array([stat.st_mtime_ns for _, stat in entries], dtype=np.int64)
+    sizes = np.array([stat.st_size for _, stat in entries], dtype=np.int64)
+
+    # Find the files whose cached links are still valid
+    cached = read_cache(cache)
+    if cached is None:
+        cached = empty_cache()
+    row = np.searchsorted(cached["files"], pages)
+    row = np.minimum(row, max(len(cached["files"]) - 1, 0))
+    valid = np.zeros(len(pages), dtype=bool)
+    if len(cached["files"]):
+        valid = ((cached["files"][row] == pages)
+                 & (cached["mtimes"][row] == mtimes)
+                 & (cached["sizes"][row] == sizes))
+
+    if valid.all() and len(pages) == len(cached["files"]):
+        names, indptr, links = cached["names"], cached["indptr"], cached["links"]
+    else:
+        names, indptr, links = patch_links(directory, pages, cached, row,
+                                           valid, workers)
+        try:
+            write_cache(cache, {
+                "version": np.array(CACHE_VERSION), "files": pages,
+                "mtimes": mtimes, "sizes": sizes,
+                "names": names, "indptr": indptr, "links": links
+            })
+        except OSError:
+            pass
+
+    # Resolve cached link names to page ids, dropping links out of the corpus
+    position = np.searchsorted(pages, names)
+    found = position < len(pages)
+    found[found] = pages[position[found]] == names[found]
+    page_ids = np.where(found, position, -1)
+
+    sources = np.repeat(np.arange(len(pages)), np.diff(indptr))
+    targets = page_ids[links]
+    keep = targets >= 0
+    return LinkGraph(pages.tolist(), sources[keep], targets[keep])
+
+
+def patch_links(directory, pages, cached, row, valid, workers=None):
+    """
+    Return the cached link arrays (names, indptr, links) for `pages`:
+    the cached links of `valid` files, and freshly parsed links of the
+    others. `row` gives each page's row in the `cached` arrays.
+    """
+    # Parse files that changed or are new, naming links like the files
+    stale = np.flatnonzero(~valid)
+    parsed = dict(zip(stale.tolist(), (
+        [os.fsdecode(link) for link in links]
+        for links in parse_pages(directory, pages[stale].tolist(), workers)
+    )))
+
+    # Look up parsed link names among the cached names, giving names not
+    # found there ids after those of the cached names
+    old_names = cached["names"]
+    fresh = np.array([link for i in stale.tolist() for link in parsed[i]],
+                     dtype=str)
+    ids = np.searchsorted(old_names, fresh)
+    missing = ids >= len(old_names)
+    missing[~missing] = old_names[ids[~missing]] != fresh[~missing]
+    new_names, inverse = np.unique(fresh[missing], return_inverse=True)
+    ids[missing] = len(old_names) + inverse.ravel()
+
+    # Assemble every page's links, in page order
+    fresh_indptr = np.cumsum([0] + [len(parsed[i]) for i in stale.tolist()])
+    fresh_start = dict(zip(stale.tolist(), fresh_indptr.tolist()))
+    segments = []
+    for i in range(len(pages)):
+        if valid[i]:
+            start, end = cached["indptr"][row[i]], cached["indptr"][row[i] + 1]
+            segments.append(cached["links"][start:end])
+        else:
+            start = fresh_start[i]
+            segments.append(ids[start:start + len(parsed[i])])
+
+    counts = np.array([len(segment) for segment in segments], dtype=np.int64)
+    indptr = np.concatenate(([0], np.cumsum(counts)))
+    links = (np.concatenate(segments).astype(np.int64) if segments
+             else np.zeros(0, dtype=np.int64))
+
+    # Keep only names still linked to, sorted so they can be searched
+    names = np.concatenate((old_names, new_names))
+    used, links = np.unique(links, return_inverse=True)
+    names = names[used]
+    order = np.argsort(names, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return names[order], indptr, rank[links].astype(np.int32)
+
+
+def empty_cache():
+    """Return the arrays of a cache holding no files."""
+    return {
+        "files": np.zeros(0, dtype=str),
+        "mtimes": np.zeros(0, dtype=np.int64),
+        "sizes": np.zeros(0, dtype=np.int64),
+        "names": np.zeros(0, dtype=str),
+        "indptr": np.zeros(1, dtype=np.int64),
+        "links": np.zeros(0, dtype=np.int32)
+    }
+
+
+def read_cache(path):
+    """
+    Return the arrays stored in the cache at `path`, or None if there
+    is no usable cache there.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != CACHE_VERSION:
+                return None
+            return {key: data[key] for key in data.files}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def default_cache(directory):
+    """
+    Return the path of the cache of `directory` used by `load_graph`:
+    a file in the user's cache directory, named after a hash of the
+    directory's absolute path, so corpora need not be writable.
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    name = hashlib.sha1(os.fsencode(os.path.abspath(directory))).hexdigest()
+    return os.path.join(root, CACHE_DIRECTORY, f"{name}.npz")
+
+
+def write_cache(path, arrays):
+    """
+    Atomically replace the cache at `path` with `arrays`, creating its
+    directory if needed.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class EdgeFile():
+    """
+    Read-only view of an out-of-core edge list written by `write_edges`.
+
+    The link sources, targets and out-degrees are memory-mapped and read
+    in blocks; once a block has been used, its pages are released with
+    madvise(MADV_DONTNEED), so the edge list never becomes resident in
+    memory as a whole, however large it is.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, EDGE_HEADER)) as f:
+            header = json.load(f)
+        if header.get("version") != EDGE_VERSION:
+            raise ValueError(f"unsupported edge list version in {directory}")
+        self.pages = header["pages"]
+        self.edges = header["edges"]
+        self.maps = []
+        self.sources = self.map(os.path.join(directory, EDGE_SOURCES), self.edges)
+        self.targets = self.map(os.path.join(directory, EDGE_TARGETS), self.edges)
+        self.degrees = self.map(os.path.join(directory, EDGE_DEGREES), self.pages)
+
+    def map(self, path, count):
+        """Memory-map `count` int32 values from the file at `path`."""
+        if count == 0:
+            return None, np.zeros(0, dtype=np.int32)
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), count * 4, access=mmap.ACCESS_READ)
+        data.madvise(mmap.MADV_SEQUENTIAL)
+        self.maps.append(data)
+        return data, np.frombuffer(data, dtype=np.int32, count=count)
+
+    def blocks(self, size):
+        """
+        Yield the link (sources, targets) in blocks of at most `size`
+        links, in order of source page.
+        """
+        for start in range(0, self.edges, size):
+            end = min(start + size, self.edges)
+            yield self.sources[1][start:end], self.targets[1][start:end]
+            release(self.sources[0], start, end)
+            release(self.targets[0], start, end)
+
+    def degree_blocks(self, size):
+        """
+        Yield (start, degrees): the out-degrees of the pages from id
+        `start` on, in blocks of at most `size` pages.
+        """
+        for start in range(0, self.pages, size):
+            end = min(start + size, self.pages)
+            yield start, self.degrees[1][start:end]
+            release(self.degrees[0], start, end)
+
+    def close(self):
+        """
+        Unmap the edge list. Arrays yielded by `blocks` and
+        `degree_blocks` must no longer be referenced.
+        """
+        self.sources = self.targets = self.degrees = None
+        for data in self.maps:
+            data.close()
+        self.maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def release(data, start, end):
+    """
+    Drop the memory pages holding int32 values start to end of the
+    memory map `data` from memory; they are read back from the file if
+    used again.
+    """
+    if data is None or end <= start:
+        return
+    offset = start * 4 // mmap.PAGESIZE * mmap.PAGESIZE
+    data.madvise(mmap.MADV_DONTNEED, offset, end * 4 - offset)
+
+
+def write_edges(directory, pages, blocks):
+    """
+    Write an out-of-core edge list of a graph of `pages` pages (page ids
+    0 to pages - 1) to `directory`, to be read back with EdgeFile.
+
+    `blocks` is an iterable of (sources, targets) arrays of links, which
+    must come in order of source page, and should hold no self links or
+    duplicates; only one block is held in memory at a time.
+    """
+    os.makedirs(directory, exist_ok=True)
+    degrees = np.zeros(0, dtype=np.int32)
+    edges = 0
+    last = 0
+    with open(os.path.join(directory, EDGE_SOURCES), "wb") as sources_file, \
+         open(os.path.join(directory, EDGE_TARGETS), "wb") as targets_file, \
+         open(os.path.join(directory, EDGE_DEGREES), "wb") as degrees_file:
+        for sources, targets in blocks:
+            sources = np.asarray(sources, dtype=np.int32)
+            targets = np.asarray(targets, dtype=np.int32)
+            if not len(sources):
+                continue
+            if sources[0] < last or np.any(np.diff(sources) < 0):
+                raise ValueError("links must be sorted by source page")
+            if (sources[-1] >= pages or targets.min() < 0
+                    or targets.max() >= pages):
+                raise ValueError("link to or from a page id out of range")
+            sources_file.write(sources.tobytes())
+            targets_file.write(targets.tobytes())
+            edges += len(sources)
+
+            # Out-degrees are final for every page before this block's
+            # last source, so only the last one is carried over
+            counts = np.bincount(sources - last, minlength=1).astype(np.int32)
+            if len(degrees):
+                counts[0] += degrees[0]
+            degrees_file.write(counts[:-1].tobytes())
+            degrees = counts[-1:]
+            last = int(sources[-1])
+        if pages:
+            degrees_file.write(degrees.tobytes() if len(degrees)
+                               else np.zeros(1, dtype=np.int32).tobytes())
+            degrees_file.write(np.zeros(pages - last - 1,
+                                        dtype=np.int32).tobytes())
+
+    with open(os.path.join(directory, EDGE_HEADER), "w") as f:
+        json.dump({"version": EDGE_VERSION, "pages": pages, "edges": edges}, f)
+
+
+def save_edges(directory, graph, block=1 << 16):
+    """
+    Write a LinkGraph to `directory` as an out-of-core edge list, `block`
+    pages at a time.
+    """
+    def blocks():
+        for start in range(0, len(graph), block):
+            end = min(start + block, len(graph))
+            low, high = graph.out_indptr[start], graph.out_indptr[end]
+            yield (np.repeat(np.arange(start, end), graph.out_degree[start:end]),
+                   graph.out_indices[low:high])
+
+    write_edges(directory, len(graph), blocks())
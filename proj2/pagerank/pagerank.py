@@ -1,3 +1,5 @@
+import argparse
+import math
 import os
 import random
 import re
@@ -7,21 +9,57 @@ import sys
 import numpy as np
 from collections import Counter
 import copy
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from linkgraph import EdgeFile, LinkGraph, crawl_graph, load_graph
 
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Rank the pages of a corpus.")
+    parser.add_argument("corpus", help="directory of HTML pages")
+    parser.add_argument("--solver", choices=SOLVERS,
+                        help="compute the iterative ranks with this solver "
+                             "instead of iterate_pagerank")
+    parser.add_argument("--tolerance", type=float, default=1e-6,
+                        help="convergence tolerance of --solver")
+    parser.add_argument("--norm", choices=NORMS, default="l1",
+                        help="norm in which --tolerance is measured")
+    parser.add_argument("--max-iterations", type=int, default=1000)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse every page again, without reading or "
+                             "writing the link-graph cache")
+    parser.add_argument("--verbose", action="store_true",
+                        help="log the residual of every iteration to stderr")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        graph = crawl_graph(args.corpus)
+    else:
+        graph = load_graph(args.corpus)
+    corpus = graph.to_corpus()
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
-    print(f"PageRank Results from Iteration")
+
+    if args.solver is None:
+        ranks = iterate_pagerank(corpus, DAMPING)
+        print(f"PageRank Results from Iteration")
+    else:
+        def log(iteration, residual):
+            print(f"  iteration {iteration}: residual {residual:.3e}",
+                  file=sys.stderr)
+
+        vector, residuals = solve_pagerank(
+            graph, DAMPING, args.solver, args.tolerance, args.norm,
+            args.max_iterations, log=log if args.verbose else None)
+        ranks = dict(zip(graph.pages, vector.tolist()))
+        print(f"PageRank Results from Iteration ({args.solver}, "
+              f"{len(residuals)} iterations)")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
@@ -156,5 +194,545 @@ def iterate_pagerank(corpus, damping_factor):
     return pagerank
     
 
+def fast_sample_pagerank(corpus, damping_factor, n, surfers=1000, seed=None):
+    """
+    Return PageRank values for each page by sampling about `n` pages,
+    walking `surfers` independent random surfers at once.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    ranks = sample_ranks(graph, damping_factor, n, surfers, seed)
+    return dict(zip(graph.pages, ranks.tolist()))
+
+
+def sample_ranks(graph, damping_factor, n, surfers=1000, seed=None):
+    """
+    Estimate PageRank on a LinkGraph from n page visits of random
+    surfers, each starting on a random page and moving by the transition
+    model, all of them moved together as one NumPy array per step.
+
+    A surfer's first steps still depend on its random starting page, so
+    each surfer takes `burn_in_steps(damping_factor)` steps before its
+    visits are counted, and then ceil(n / surfers) counted steps. So
+    that burning in at most doubles the work, `surfers` is reduced to at
+    most n divided by the burn-in.
+
+    Every choice the transition model makes is uniform (a link of the
+    current page, or any page), so the next page is drawn in O(1) by
+    scaling a uniform random number by the current page's out-degree and
+    indexing into the graph's CSR links. `seed` seeds the random number
+    generator, making the estimate reproducible.
+
+    Return the vector of visit frequencies.
+    """
+    rng = np.random.default_rng(seed)
+    size = len(graph)
+    burn_in = burn_in_steps(damping_factor)
+    surfers = max(1, min(surfers, n // max(burn_in, 1)))
+    steps = -(-n // surfers)
+
+    pages = rng.integers(size, size=surfers)
+    visits = np.zeros(size, dtype=np.int64)
+    for step in range(burn_in + steps):
+        # Follow a link with probability damping_factor, unless the page
+        # has none; otherwise jump to a page chosen at random
+        follow = (rng.random(surfers) < damping_factor) & ~graph.dangling[pages]
+        next_pages = rng.integers(size, size=surfers)
+        current = pages[follow]
+        offsets = (rng.random(current.size) * graph.out_degree[current]).astype(np.int64)
+        next_pages[follow] = graph.out_indices[graph.out_indptr[current] + offsets]
+        pages = next_pages
+        if step >= burn_in:
+            visits += np.bincount(pages, minlength=size)
+
+    return visits / visits.sum()
+
+
+def burn_in_steps(damping_factor):
+    """
+    Return the number of steps after which a random surfer's position
+    depends on its starting page with probability at most
+    BURN_IN_TOLERANCE: every step teleports with probability
+    1 - `damping_factor`, which forgets the start, so this is
+    log(BURN_IN_TOLERANCE) / log(damping_factor).
+    """
+    if not 0 < damping_factor < 1:
+        return 0
+    return math.ceil(math.log(BURN_IN_TOLERANCE) / math.log(damping_factor))
+
+
+# Probability of a surfer's counted visits still depending on where it
+# started, after sample_ranks' burn-in
+BURN_IN_TOLERANCE = 1e-4
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=1e-6):
+    """
+    Return PageRank values for each page by power iteration over a
+    sparse transition matrix, until the ranks change by less than
+    `tolerance` in L1 norm.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    ranks, _ = power_iteration(graph, damping_factor, tolerance)
+    return dict(zip(graph.pages, ranks.tolist()))
+
+
+def power_iteration(graph, damping_factor, tolerance=1e-6, ranks=None):
+    """
+    Iterate PageRank on a LinkGraph, starting from `ranks` (uniform if
+    None), until the ranks change by less than `tolerance` in L1 norm.
+
+    A page with no links is treated as linking to every page, so the
+    rank it holds is spread evenly over the whole corpus.
+
+    Return a tuple of the rank vector and the number of iterations.
+    """
+    ranks, residuals = solve_pagerank(graph, damping_factor, "power",
+                                      tolerance, ranks=ranks)
+    return ranks, len(residuals)
+
+
+def solve_pagerank(graph, damping_factor, solver="power", tolerance=1e-6,
+                   norm="l1", max_iterations=1000, ranks=None, log=None):
+    """
+    Compute PageRank on a LinkGraph with one of SOLVERS:
+        * "power": power iteration (Jacobi updates of every page at once),
+        * "gauss-seidel": updates pages one at a time, each using the
+          ranks already updated in the same sweep,
+        * "aitken": power iteration, with Aitken delta-squared
+          extrapolation of each page's rank every EXTRAPOLATION_PERIOD
+          iterations,
+        * "quadratic": power iteration, with quadratic extrapolation
+          every EXTRAPOLATION_PERIOD iterations,
+        * "direct": solves the PageRank linear system exactly, as a sparse
+          system, for graphs of up to DIRECT_LIMIT pages.
+
+    Iterative solvers start from `ranks` (uniform if None) and stop once
+    the ranks change by less than `tolerance`, measured in `norm` (one
+    of NORMS), or after `max_iterations`. If `log` is given, it is called
+    with the iteration number and residual after every iteration.
+
+    Return a tuple of the rank vector and the list of residuals.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver!r}")
+    if norm not in NORMS:
+        raise ValueError(f"unknown norm {norm!r}")
+    distance = NORMS[norm]
+    n = len(graph)
+    if ranks is None:
+        ranks = np.full(n, 1 / n)
+    ranks = np.array(ranks, dtype=np.float64)
+    residuals = []
+
+    if solver == "direct":
+        ranks = direct_solve(graph, damping_factor)
+        residuals.append(distance(pagerank_step(graph, damping_factor, ranks)
+                                  - ranks))
+        if log is not None:
+            log(1, residuals[-1])
+        return ranks, residuals
+
+    if solver == "gauss-seidel":
+        sweep = gauss_seidel_sweep(graph, damping_factor)
+    history = [ranks]
+    for iteration in range(1, max_iterations + 1):
+        if solver == "gauss-seidel":
+            new_ranks = sweep(ranks)
+        else:
+            new_ranks = pagerank_step(graph, damping_factor, ranks)
+            history = history[-3:] + [new_ranks]
+            if iteration % EXTRAPOLATION_PERIOD == 0 and len(history) == 4:
+                if solver == "aitken":
+                    new_ranks = aitken_extrapolation(*history[-3:])
+                elif solver == "quadratic":
+                    new_ranks = quadratic_extrapolation(*history)
+                history = [new_ranks]
+
+        residuals.append(distance(new_ranks - ranks))
+        ranks = new_ranks
+        if log is not None:
+            log(iteration, residuals[-1])
+        if residuals[-1] < tolerance:
+            break
+
+    return ranks / ranks.sum(), residuals
+
+
+# Norms by which solve_pagerank measures the change between iterations
+NORMS = {
+    "l1": lambda v: float(np.abs(v).sum()),
+    "l2": lambda v: float(np.sqrt(np.dot(v, v))),
+    "max": lambda v: float(np.abs(v).max()) if len(v) else 0.0
+}
+
+SOLVERS = ("power", "gauss-seidel", "aitken", "quadratic", "direct")
+
+# Iterations between extrapolations of the "aitken" and "quadratic" solvers
+EXTRAPOLATION_PERIOD = 10
+
+# Largest graph the "direct" solver will factorize; the LU factors fill
+# in quickly on web graphs, taking about 20s at this size
+DIRECT_LIMIT = 10000
+
+
+def pagerank_step(graph, damping_factor, ranks):
+    """
+    Return the ranks after one power iteration from `ranks`.
+    """
+    n = len(graph)
+    dangling = ranks[graph.dangling].sum()
+    return (damping_factor * (graph.propagate(ranks) + dangling / n)
+            + (1 - damping_factor) / n)
+
+
+def gauss_seidel_sweep(graph, damping_factor):
+    """
+    Return a function that performs one Gauss-Seidel sweep over a copy
+    of a rank vector: every page, in order, is given the rank the
+    PageRank equation assigns it from the current ranks of the pages
+    linking to it, including those already updated in this sweep. The
+    ranks are renormalized to sum to 1 after every sweep.
+    """
+    n = len(graph)
+    indptr = graph.in_indptr.tolist()
+    sources = graph.in_indices.tolist()
+    weights = graph.in_weights.tolist()
+    dangling = graph.dangling.tolist()
+    teleport = (1 - damping_factor) / n
+
+    def sweep(ranks):
+        ranks = ranks.tolist()
+        held = sum(rank for rank, empty in zip(ranks, dangling) if empty)
+        for i in range(n):
+            total = 0
+            for k in range(indptr[i], indptr[i + 1]):
+                total += ranks[sources[k]] * weights[k]
+            rank = teleport + damping_factor * (total + held / n)
+            if dangling[i]:
+                held += rank - ranks[i]
+            ranks[i] = rank
+        ranks = np.array(ranks)
+        return ranks / ranks.sum()
+
+    return sweep
+
+
+def aitken_extrapolation(x0, x1, x2):
+    """
+    Extrapolate the limit of each page's rank from three successive
+    power iterations by Aitken's delta-squared process, keeping the
+    latest rank wherever the process is undefined or goes negative.
+    """
+    first = x1 - x0
+    second = x2 - x1
+    curvature = second - first
+    with np.errstate(divide="ignore", invalid="ignore"):
+        limit = x2 - second * second / curvature
+    limit = np.where((np.abs(curvature) > 1e-15) & (limit >= 0), limit, x2)
+    return limit / limit.sum()
+
+
+def quadratic_extrapolation(x0, x1, x2, x3):
+    """
+    Extrapolate the limit of four successive power iterations by
+    quadratic extrapolation, which assumes the iterates are a
+    combination of the first three eigenvectors of the transition matrix
+    (Kamvar et al., "Extrapolation Methods for Accelerating PageRank
+    Computations").
+    """
+    y = np.column_stack((x1 - x0, x2 - x0))
+    gamma, *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+    g1, g2 = gamma
+    g3 = 1
+    limit = (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+    if not np.all(np.isfinite(limit)) or limit.sum() <= 0:
+        return x3
+    limit = np.maximum(limit, 0)
+    return limit / limit.sum()
+
+
+def direct_solve(graph, damping_factor):
+    """
+    Return the exact PageRank vector of a LinkGraph of at most
+    DIRECT_LIMIT pages, by solving (I - d * G) x = (1 - d) / N as a
+    sparse system, where G is the transition matrix with pages without
+    links linking to every page.
+
+    G is the sparse matrix M of the graph plus the rank-one matrix
+    1 * dangling^T / N, so by the Sherman-Morrison formula x is
+    A^-1 (1 - d) / N plus a multiple of A^-1 1, where A = I - d * M. Both
+    are multiples of y = A^-1 1, so only A y = 1 is solved, by sparse LU
+    factorization, and y is normalized to sum to 1.
+    """
+    n = len(graph)
+    if n > DIRECT_LIMIT:
+        raise ValueError(f"direct solver is limited to {DIRECT_LIMIT} pages")
+    system = sparse.identity(n, format="csc") - damping_factor * graph.transition
+    ranks = spsolve(system.tocsc(), np.ones(n), permc_spec="MMD_AT_PLUS_A")
+    return ranks / ranks.sum()
+
+
+def update_pagerank(graph, ranks, damping_factor, added_pages=(),
+                    removed_pages=(), added_links=(), removed_links=(),
+                    tolerance=1e-6, push=False):
+    """
+    Recompute PageRank after a small change to a LinkGraph whose rank
+    vector `ranks` is known, rather than starting again from 1 / N.
+
+    The change is given as pages and (source, target) links, by name, to
+    add or remove, as for LinkGraph.edit. Surviving pages start from
+    their previous rank and new pages from 1 / N, renormalized to sum
+    to 1. From there, the ranks are refined by power iteration, or with
+    `push`, by pushing only residuals larger than `tolerance` / N, which
+    leaves most of a large graph untouched after a local edit.
+
+    Return a tuple (graph, ranks, iterations) for the edited graph.
+    """
+    graph, old_ids = graph.edit(added_pages, removed_pages,
+                                added_links, removed_links)
+    start = warm_start(ranks, old_ids)
+    if push:
+        ranks, iterations = push_iteration(graph, damping_factor, tolerance, start)
+    else:
+        ranks, iterations = power_iteration(graph, damping_factor, tolerance, start)
+    return graph, ranks, iterations
+
+
+def warm_start(ranks, old_ids):
+    """
+    Return starting ranks for an edited graph, given the `ranks` of the
+    graph before the edit and each page's id in it (-1 for new pages,
+    which start from 1 / N), renormalized to sum to 1.
+    """
+    start = np.where(old_ids >= 0, ranks[np.maximum(old_ids, 0)],
+                     1 / len(old_ids))
+    return start / start.sum()
+
+
+def push_iteration(graph, damping_factor, tolerance=1e-6, ranks=None):
+    """
+    Refine PageRank on a LinkGraph from `ranks` (uniform if None) by
+    pushing residuals: every page whose residual, the amount by which
+    its rank falls short of the PageRank equation, exceeds
+    `tolerance` / N absorbs it and passes it on along its links. Only
+    the links of those pages are followed, so when `ranks` is already
+    close to the solution except around a few pages, each round does
+    far less work than a full power iteration.
+
+    Stops once the residuals sum to at most `tolerance` in L1 norm, and
+    returns a tuple of the rank vector and the number of rounds.
+    """
+    n = len(graph)
+    if ranks is None:
+        ranks = np.full(n, 1 / n)
+    ranks = ranks.copy()
+    dangling = ranks[graph.dangling].sum()
+    residuals = (damping_factor * (graph.propagate(ranks) + dangling / n)
+                 + (1 - damping_factor) / n - ranks)
+
+    rounds = 0
+    while True:
+        active = np.flatnonzero(np.abs(residuals) > tolerance / n)
+        if not active.size:
+            return ranks, rounds
+        rounds += 1
+        pushed = residuals[active]
+        ranks[active] += pushed
+        residuals[active] = 0
+
+        # Pass the pushed residuals along the links of the active pages;
+        # pages without links pass theirs to every page
+        degrees = graph.out_degree[active]
+        starts = graph.out_indptr[active]
+        offsets = np.arange(degrees.sum()) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+        targets = graph.out_indices[np.repeat(starts, degrees) + offsets]
+        shares = np.repeat(pushed / np.maximum(degrees, 1), degrees)
+        residuals += damping_factor * np.bincount(targets, weights=shares,
+                                                  minlength=n)
+        residuals += damping_factor * pushed[degrees == 0].sum() / n
+
+
+def personalized_pagerank(corpus, damping_factor, preferences, tolerance=1e-6):
+    """
+    Return personalized PageRank values for each of `preferences`, each
+    a dictionary mapping pages to how often the random surfer teleports
+    to them (or a set of pages, teleported to with equal probability),
+    in place of choosing a page uniformly at random.
+
+    Return a list of dictionaries, one per preference, where keys are
+    page names, and values are their PageRank value. All PageRank
+    values of one dictionary sum to 1.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    teleport = teleport_matrix(graph, preferences)
+    ranks, _ = personalized_iteration(graph, damping_factor, teleport, tolerance)
+    return [dict(zip(graph.pages, column)) for column in ranks.T.tolist()]
+
+
+def teleport_matrix(graph, preferences):
+    """
+    Return the N x K teleport matrix of K `preferences` over the pages of
+    a LinkGraph, each a dictionary of weights by page or a set of pages
+    weighted equally. Every column is normalized to sum to 1.
+    """
+    teleport = np.zeros((len(graph), len(preferences)))
+    for k, preference in enumerate(preferences):
+        if not isinstance(preference, dict):
+            preference = dict.fromkeys(preference, 1)
+        for page, weight in preference.items():
+            teleport[graph.ids[page], k] += weight
+    totals = teleport.sum(axis=0)
+    if np.any(totals <= 0):
+        raise ValueError("every preference needs a page of positive weight")
+    return teleport / totals
+
+
+def topic_teleport(graph, topic, topics):
+    """
+    Return the N x K teleport matrix of topic-sensitive PageRank: `topic`
+    is a function mapping a page name to its topic, and column k
+    teleports uniformly to the pages whose topic is topics[k].
+    """
+    labels = [topic(page) for page in graph.pages]
+    return teleport_matrix(graph, [
+        {page for page, label in zip(graph.pages, labels) if label == name}
+        for name in topics
+    ])
+
+
+def personalized_iteration(graph, damping_factor, teleport, tolerance=1e-6,
+                           max_iterations=1000):
+    """
+    Iterate personalized PageRank on a LinkGraph for every column of the
+    N x K `teleport` matrix at once (or for a single teleport vector),
+    until no column changes by more than `tolerance` in L1 norm. Each
+    iteration propagates all K rank vectors with a single sparse-dense
+    product, which reads every link once for all of them.
+
+    With probability 1 - `damping_factor`, and from pages without links,
+    the surfer teleports to a page drawn from the column's distribution.
+
+    Return a tuple of the N x K rank matrix and the number of iterations.
+    """
+    teleport = np.ascontiguousarray(teleport, dtype=np.float64)
+    ranks = teleport.copy()
+    transition = damping_factor * graph.transition
+
+    # Teleport vectors usually favour few pages, so only the rows of the
+    # pages some vector teleports to are updated with the teleport term
+    favoured = np.flatnonzero(teleport.reshape(len(graph), -1).any(axis=1))
+    favoured_teleport = teleport[favoured]
+
+    scratch = np.empty((PERSONALIZED_BLOCK,) + ranks.shape[1:])
+    ones = np.ones(PERSONALIZED_BLOCK)
+    for iteration in range(1, max_iterations + 1):
+        dangling = ranks[graph.dangling].sum(axis=0)
+        new_ranks = transition @ ranks
+        new_ranks[favoured] += ((damping_factor * dangling + 1 - damping_factor)
+                                * favoured_teleport)
+
+        # Sum the change of every column over blocks of pages small
+        # enough for the differences to stay in cache
+        change = np.zeros(ranks.shape[1:])
+        for start in range(0, len(graph), PERSONALIZED_BLOCK):
+            end = min(start + PERSONALIZED_BLOCK, len(graph))
+            difference = scratch[:end - start]
+            np.subtract(new_ranks[start:end], ranks[start:end], out=difference)
+            change += ones[:end - start] @ np.abs(difference, out=difference)
+        ranks = new_ranks
+        if change.max(initial=0) < tolerance:
+            break
+    return ranks / ranks.sum(axis=0), iteration
+
+
+# Pages per block over which personalized_iteration measures the change
+PERSONALIZED_BLOCK = 4096
+
+
+def out_of_core_pagerank(directory, damping_factor, tolerance=1e-6,
+                         memory_budget=None, dtype=np.float64,
+                         max_iterations=1000):
+    """
+    Iterate PageRank over the out-of-core edge list in `directory` (see
+    `write_edges`), until the ranks change by less than `tolerance` in
+    L1 norm, for graphs whose links do not fit in memory.
+
+    Every iteration streams the memory-mapped links in blocks, so only
+    vectors of one value per page stay resident: the ranks and each
+    page's share of its rank per link, stored as `dtype` (np.float64 or
+    np.float32), and the float64 rank received through links. Blocks
+    are sized so that the memory allocated stays within `memory_budget`
+    bytes, if given; otherwise they hold OUT_OF_CORE_BLOCK links.
+
+    Return a tuple of the rank vector and the number of iterations.
+    """
+    with EdgeFile(directory) as edges:
+        n = edges.pages
+        itemsize = np.dtype(dtype).itemsize
+        if memory_budget is None:
+            block = OUT_OF_CORE_BLOCK
+        else:
+            # Two vectors of `dtype` and two of float64 (the received rank
+            # and the block's bincount) per page, plus the temporaries of
+            # a block of links
+            block = (memory_budget - n * (2 * itemsize + 16)) // BYTES_PER_LINK
+            if block < 1:
+                raise ValueError(f"a memory budget of {memory_budget} bytes "
+                                 f"cannot hold the ranks of {n} pages")
+
+        ranks = np.full(n, 1 / n, dtype=dtype)
+        shares = np.empty(n, dtype=dtype)
+        for iteration in range(1, max_iterations + 1):
+            # Split each page's rank among its links, and gather the rank
+            # of pages without links, which is spread over every page
+            dangling = 0.0
+            for start, degrees in edges.degree_blocks(block):
+                end = start + len(degrees)
+                linked = degrees > 0
+                dangling += float(ranks[start:end][~linked].sum(dtype=np.float64))
+                np.divide(ranks[start:end], degrees, out=shares[start:end],
+                          where=linked)
+                shares[start:end][~linked] = 0
+                del degrees
+
+            received = np.zeros(n)
+            for sources, targets in edges.blocks(block):
+                received += np.bincount(targets, weights=shares[sources],
+                                        minlength=n)
+                del sources, targets
+
+            received += dangling / n
+            received *= damping_factor
+            received += (1 - damping_factor) / n
+
+            # The change is measured in the shares' buffer, which is
+            # recomputed at the start of the next iteration anyway
+            np.subtract(received, ranks, out=shares, casting="unsafe")
+            change = float(np.abs(shares, out=shares).sum(dtype=np.float64))
+            ranks[:] = received
+            del received
+            if change < tolerance:
+                break
+
+    ranks /= ranks.sum(dtype=np.float64)
+    return ranks, iteration
+
+
+# Links read per block by out_of_core_pagerank without a memory budget
+OUT_OF_CORE_BLOCK = 1 << 22
+
+# Upper bound on the bytes out_of_core_pagerank allocates per link of a
+# block: the gathered shares, their float64 weights and int64 targets
+BYTES_PER_LINK = 24
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+from linkgraph import LinkGraph, write_edges
+
+
+def synthetic_graph(n, degree=8, exponent=2.1, dangling=0.1, components=1,
+                    max_degree=1000, seed=None):
+    """
+    Generate a random web-like LinkGraph of `n` pages.
+
+    Out-degrees follow a power law, P(k) proportional to k ** -exponent,
+    truncated at `max_degree` and scaled to a mean of about `degree`
+    among pages with links (before duplicate links are dropped), except that
+    a fraction `dangling` of the pages have no links at all. Pages are
+    split into `components` groups of roughly equal size, and links stay
+    within a group, so the graph has at least that many disconnected
+    components. Within a group, link targets favour a few popular pages:
+    the page of rank r in a random popularity order is chosen with
+    probability roughly proportional to 1 / sqrt(r), giving the heavy
+    tailed in-degrees of real web graphs.
+
+    Pages are named "0.html", "1.html", ... in order.
+    """
+    sources, targets = next(synthetic_links(n, degree, exponent, dangling,
+                                            components, max_degree, seed=seed))
+    return LinkGraph([f"{i}.html" for i in range(n)], sources, targets)
+
+
+def write_synthetic_edges(directory, n, degree=8, exponent=2.1, dangling=0.1,
+                          components=1, max_degree=1000, block=1 << 16,
+                          seed=None):
+    """
+    Write a random web-like graph of `n` pages, generated as by
+    `synthetic_graph`, to `directory` as an out-of-core edge list (see
+    `write_edges`), generating the links of `block` pages at a time so
+    that graphs too large for memory can be written.
+    """
+    def blocks():
+        for sources, targets in synthetic_links(n, degree, exponent, dangling,
+                                                components, max_degree,
+                                                block, seed):
+            # Drop self links and duplicates; every page's links are
+            # generated in the same block, so this is done per block
+            keep = sources != targets
+            links = np.sort(sources[keep] * n + targets[keep])
+            links = links[np.diff(links, prepend=-1) != 0]
+            yield np.divmod(links, n)
+
+    write_edges(directory, n, blocks())
+
+
+def synthetic_links(n, degree, exponent, dangling, components, max_degree,
+                    block=None, seed=None):
+    """
+    Yield the (sources, targets) links of the random graph described by
+    `synthetic_graph`, in order of source page, for `block` pages at a
+    time (all at once if None). Links may repeat or point to their
+    source.
+    """
+    rng = np.random.default_rng(seed)
+    components = max(1, min(components, n))
+
+    # Power-law out-degrees with the requested mean, then dangling pages
+    raw = np.minimum(rng.pareto(exponent - 1, size=n) + 1, max_degree)
+    counts = np.rint(raw * degree / raw.mean()).astype(np.int64)
+    counts = np.clip(counts, 1, min(max_degree, n - 1))
+    counts[rng.random(n) < dangling] = 0
+
+    # Each page belongs to the component of its position in a shuffle,
+    # whose pages occupy one contiguous block of that shuffle
+    order = rng.permutation(n)
+    bounds = np.linspace(0, n, components + 1).astype(np.int64)
+    group = np.repeat(np.arange(components), np.diff(bounds))
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n)
+
+    block = block or max(n, 1)
+    for first in range(0, max(n, 1), block):
+        last = min(first + block, n)
+        sources = np.repeat(np.arange(first, last), counts[first:last])
+        source_group = group[position[sources]]
+        start = bounds[source_group]
+        size = bounds[source_group + 1] - start
+        offsets = np.floor(size * rng.random(sources.size) ** 2).astype(np.int64)
+        targets = order[start + np.minimum(offsets, size - 1)]
+        yield sources, targets
+
+
+def write_corpus(graph, directory):
+    """
+    Write a LinkGraph to `directory` as one HTML file per page, linking
+    to the pages it links to, so that it can be read back with `crawl`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for i, page in enumerate(graph.pages):
+        links = "\n".join(f'        <li><a href="{graph.pages[j]}">{graph.pages[j]}</a></li>'
+                          for j in graph.links(i).tolist())
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"""<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{page}</title>
+    </head>
+    <body>
+        <h1>{page}</h1>
+        <ul>
+{links}
+        </ul>
+    </body>
+</html>
+""")